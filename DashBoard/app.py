@@ -1,15 +1,17 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import pandas as pd
-import numpy as np
-from sentence_transformers import SentenceTransformer
-from statsmodels.tsa.arima.model import ARIMA
 from sklearn.metrics import mean_absolute_error
-from itertools import product
 import matplotlib.pyplot as plt
 import openai
 import os
 
+import arima_search
+from forecast_store import aggregate, get_forecast_store
+from knowledge_base import IdIndex, encode_queries, load_csvs, load_embeddings, query_cache_stats
+from sales_store import get_sales_store
+from vector_index import build_index
+
 # Initialize Flask app and CORS
 app = Flask(__name__)
 CORS(app)
@@ -17,51 +19,57 @@ CORS(app)
 # Load environment variables
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-# Initialize SentenceTransformer model
-model = SentenceTransformer('all-MiniLM-L6-v2')
-
-# Embedding and loading functions
-def embed_data(df, columns):
-    texts = df[columns].fillna("").astype(str).agg(" ".join, axis=1).tolist()
-    embeddings = model.encode(texts, convert_to_tensor=True).cpu().numpy()
-    return embeddings
-
-def load_csvs():
-    orders_df = pd.read_csv(r'Databases\Chatbot_Knowledge_base/orders.csv')
-    shipments_df = pd.read_csv(r'Databases\Chatbot_Knowledge_base/shipments.csv')
-    products_df = pd.read_csv(r'Databases\Chatbot_Knowledge_base/products.csv')
-    inventory_df = pd.read_csv(r'Databases\Chatbot_Knowledge_base\category_stock_inventoryy.csv')  
-    return orders_df, shipments_df, products_df, inventory_df
-
-def generate_embeddings():
-    orders_df, shipments_df, products_df, _ = load_csvs()
-    orders_embeddings = embed_data(orders_df, ["Order ID", "Customer Name", "Product Description", "Order Status"])
-    shipments_embeddings = embed_data(shipments_df, ["Tracking ID", "Shipping Address", "Shipment Status", "Product Description"])
-    products_embeddings = embed_data(products_df, ["Product ID", "Product Name", "Product Description", "Price", "Product Category"])
-    return orders_df, shipments_df, products_df, orders_embeddings, shipments_embeddings, products_embeddings
-
-# Load data and embeddings
-orders_df, shipments_df, products_df, orders_embeddings, shipments_embeddings, products_embeddings = generate_embeddings()
-_, _, _, inventory_df = load_csvs()
+# Knowledge base tables, read once, and their embeddings from the on-disk
+# cache; the SentenceTransformer only loads if some rows need encoding
+tables = load_csvs()
+orders_df, shipments_df, products_df, inventory_df = (
+    tables["orders"], tables["shipments"], tables["products"], tables["inventory"])
+embeddings, _ = load_embeddings(tables)
+orders_embeddings = embeddings["orders"]
+shipments_embeddings = embeddings["shipments"]
+products_embeddings = embeddings["products"]
 inventory = dict(zip(inventory_df['category'], inventory_df['remaining_stock']))
 
-# ARIMA optimization function
-def optimize_arima_model(series):
-    p = d = q = range(0, 3)
-    pdq = list(product(p, d, q))
-    best_model = None
-    best_aic = np.inf
+# Nightly-style refresh of the forecast models, if ARIMA_REFRESH_INTERVAL is set
+arima_search.start_refresh_thread(get_sales_store())
 
-    for param in pdq:
-        try:
-            model = ARIMA(series, order=param)
-            results = model.fit()
-            if results.aic < best_aic:
-                best_aic = results.aic
-                best_model = results
-        except:
+# Cosine-similarity indexes over the embeddings (see vector_index.py), and
+# exact lookup for queries that name an Order/Tracking/Product ID or SKU
+search_tables = {
+    "orders": (build_index(orders_embeddings), orders_df),
+    "shipments": (build_index(shipments_embeddings), shipments_df),
+    "products": (build_index(products_embeddings), products_df),
+}
+id_index = IdIndex(tables)
+
+QUERY_TOP_K = 3
+MAX_BATCH_QUERIES = 256
+
+def answer_queries(texts, k=QUERY_TOP_K):
+    """
+    Top rows per table for each query. Queries naming a known identifier
+    get the rows it identifies; the rest share one encode call and one
+    matrix multiply per table.
+    """
+    results = [None] * len(texts)
+    semantic = []
+    for i, text in enumerate(texts):
+        ids, rows = id_index.lookup(text)
+        if not ids:
+            semantic.append(i)
             continue
-    return best_model
+        results[i] = {f"top_{name}": df.iloc[rows.get(name, [])].to_dict(orient="records")
+                      for name, (_, df) in search_tables.items()}
+        results[i].update(match="id", ids=ids)
+
+    if semantic:
+        query_embeddings = encode_queries([texts[i] for i in semantic])
+        found = {name: index.search(query_embeddings, k)[1] for name, (index, _) in search_tables.items()}
+        for j, i in enumerate(semantic):
+            results[i] = {f"top_{name}": df.iloc[found[name][j][found[name][j] >= 0]].to_dict(orient="records")
+                          for name, (_, df) in search_tables.items()}
+            results[i]["match"] = "semantic"
+    return results
 
 # OpenAI recommendation query function
 def query_llm_for_suggestions(category_data, forecast):
@@ -85,6 +93,8 @@ def query_llm_for_suggestions(category_data, forecast):
     )
     return response['choices'][0]['message']['content'].strip()
 
+FORECAST_DAYS = 30
+
 # Sales forecasting route
 @app.route("/api/sales_forecast", methods=["POST"])
 def sales_forecast():
@@ -95,23 +105,42 @@ def sales_forecast():
         if not category or category not in inventory:
             return jsonify({"error": "Category not found in inventory"}), 400
 
-        df_sales = pd.read_csv('sales_data.csv')  # Replace with actual sales data file
-        df_sales['order_date'] = pd.to_datetime(df_sales['order_date'])
-        df_daily = df_sales.groupby(['order_date', 'category']).agg({'qty_ordered': 'sum'}).reset_index()
-        df_daily.set_index('order_date', inplace=True)
+        # Daily totals kept in memory and refreshed when sales_data.csv changes
+        try:
+            category_data = get_sales_store().series(category)
+        except OSError:
+            category_data = None  # No sales file; only a precomputed forecast can answer
 
-        category_data = df_daily[df_daily['category'] == category]['qty_ordered']
-        if len(category_data) < 30:
-            return jsonify({"error": "Not enough data to make a reliable forecast"}), 400
+        # The precomputed forecast file for the category, unless a live ARIMA
+        # forecast is asked for, there is none, or it does not start after
+        # the last day of observed sales (its dates would be stale)
+        precomputed = None
+        if not data.get("live"):
+            try:
+                precomputed = get_forecast_store().get(category, days=FORECAST_DAYS)
+            except OSError:
+                pass  # Forecast directory unavailable
+            if precomputed is not None and (not len(precomputed) or (
+                    category_data is not None and precomputed.index[0] <= category_data.index[-1])):
+                precomputed = None
+        if precomputed is not None:
+            model_info = None
+            forecast_dates, forecast = precomputed.index, precomputed
+        else:
+            if category_data is None or len(category_data) < arima_search.MIN_OBSERVATIONS:
+                return jsonify({"error": "Not enough data to make a reliable forecast"}), 400
 
-        # Optimize ARIMA and forecast
-        best_model = optimize_arima_model(category_data)
-        forecast = best_model.forecast(steps=30)
+            # The category's model: cached, extended with new days, or a fresh order search
+            search, update = arima_search.get_model(category, category_data)
+            forecast = search.model.forecast(steps=FORECAST_DAYS)
+            forecast_dates = pd.date_range(category_data.index[-1], periods=FORECAST_DAYS, freq='D')
+            model_info = dict(search.diagnostics(), update=update)
 
         # Save plot
         plt.figure(figsize=(10, 6))
-        plt.plot(category_data.index, category_data, label='Actual Sales')
-        plt.plot(pd.date_range(category_data.index[-1], periods=30, freq='D'), forecast, label='Forecast', color='red')
+        if category_data is not None:
+            plt.plot(category_data.index, category_data, label='Actual Sales')
+        plt.plot(forecast_dates, forecast, label='Forecast', color='red')
         plt.title(f'Sales Forecast for {category}')
         plt.xlabel('Date')
         plt.ylabel('Quantity Sold')
@@ -126,11 +155,68 @@ def sales_forecast():
         return jsonify({
             "forecast": forecast.tolist(),
             "plot_path": plot_path,
-            "suggestion": suggestion
+            "suggestion": suggestion,
+            "source": "arima" if model_info else "precomputed",
+            "model": model_info,
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/sales_forecast/models", methods=["GET"])
+def sales_forecast_models():
+    return jsonify(arima_search.cached_models())
+
+@app.route("/api/sales_forecast/refresh", methods=["POST"])
+def sales_forecast_refresh():
+    # Brings every category's model up to date, e.g. from a nightly cron job
+    try:
+        return jsonify(arima_search.refresh_all(get_sales_store()))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/forecast", methods=["GET"])
+def forecast_categories():
+    store = get_forecast_store()
+    try:
+        categories = store.categories()
+    except OSError as e:
+        return jsonify({"error": f"Forecasts unavailable: {e}"}), 503
+    return jsonify(dict(store.stats(), categories=categories))
+
+@app.route("/api/forecast/<category>", methods=["GET"])
+def get_forecast(category):
+    """
+    Precomputed forecast for a category. Query parameters: start and end
+    (YYYY-MM-DD, inclusive), days (horizon from the first date returned)
+    and aggregate (day, week or month).
+    """
+    try:
+        start, end = request.args.get("start"), request.args.get("end")
+        days = request.args.get("days", type=int)
+        period = request.args.get("aggregate", "day")
+        if days is not None and days < 1:
+            raise ValueError("days must be a positive integer.")
+        forecast = get_forecast_store().get(category, start, end, days)
+        if forecast is None:
+            return jsonify({"error": f"No precomputed forecast for {category}",
+                            "categories": get_forecast_store().categories()}), 404
+        forecast = aggregate(forecast, period)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except OSError as e:
+        # The forecast directory is missing or unreadable
+        return jsonify({"error": f"Forecasts unavailable: {e}"}), 503
+
+    return jsonify({
+        "category": category,
+        "aggregate": period,
+        "start": forecast.index[0].strftime("%Y-%m-%d") if len(forecast) else None,
+        "end": forecast.index[-1].strftime("%Y-%m-%d") if len(forecast) else None,
+        "total": float(forecast.sum()),
+        "forecast": [{"date": date.strftime("%Y-%m-%d"), "forecast_sales": float(value)}
+                     for date, value in forecast.items()],
+    })
+
 # Existing routes for orders, shipments, and products
 @app.route("/api/orders", methods=["GET"])
 def get_orders():
@@ -159,22 +245,28 @@ def query_embeddings():
         if not query_text:
             return jsonify({"error": "Query text is required."}), 400
 
-        query_embedding = model.encode([query_text], convert_to_tensor=True).cpu().numpy()
-        orders_similarity = np.dot(orders_embeddings, query_embedding.T).flatten()
-        shipments_similarity = np.dot(shipments_embeddings, query_embedding.T).flatten()
-        products_similarity = np.dot(products_embeddings, query_embedding.T).flatten()
+        return jsonify(answer_queries([query_text])[0])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        top_orders = orders_df.iloc[np.argsort(-orders_similarity)[:3]].to_dict(orient="records")
-        top_shipments = shipments_df.iloc[np.argsort(-shipments_similarity)[:3]].to_dict(orient="records")
-        top_products = products_df.iloc[np.argsort(-products_similarity)[:3]].to_dict(orient="records")
+@app.route("/api/query/batch", methods=["POST"])
+def query_embeddings_batch():
+    try:
+        data = request.json or {}
+        queries = data.get("queries")
+        if (not isinstance(queries, list) or not queries
+                or not all(isinstance(q, str) and q for q in queries)):
+            return jsonify({"error": "'queries' must be a non-empty list of query strings."}), 400
+        if len(queries) > MAX_BATCH_QUERIES:
+            return jsonify({"error": f"At most {MAX_BATCH_QUERIES} queries per request."}), 400
 
-        return jsonify({
-            "top_orders": top_orders,
-            "top_shipments": top_shipments,
-            "top_products": top_products,
-        })
+        return jsonify({"results": answer_queries(queries)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/query/cache-stats", methods=["GET"])
+def query_cache_stats_route():
+    return jsonify(query_cache_stats())
+
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
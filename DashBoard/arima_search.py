@@ -0,0 +1,285 @@
+"""
+ARIMA order search for the sales forecasts.
+
+Each search fits the (p, d, q) grid on a process pool of its own, in
+waves of increasing p + q. An order is only tried once its smaller
+neighbours (one less p or one less q, same d) have converged, so a
+branch of the grid that stops converging is dropped early instead of
+being fitted to the end. Each fit has a time limit. The chosen model is
+cached per category under a hash of the series, so repeat requests on
+unchanged data do not refit.
+
+When a category's series only gains new days, the cached model takes them
+in through statsmodels' append with its parameters kept, which costs one
+Kalman filter pass instead of a search. The full search runs again once
+the last one is ARIMA_SEARCH_MAX_AGE seconds old, or when the model's
+one-step errors on the new days drift past ARIMA_DRIFT_THRESHOLD times
+its recent in-sample error.
+"""
+import hashlib
+import math
+import multiprocessing
+import os
+import threading
+import time
+import warnings
+from itertools import product
+
+import numpy as np
+from statsmodels.tsa.arima.model import ARIMA
+
+ARIMA_ORDERS = list(product(range(3), repeat=3))
+# 0 fits every order in the request process, one after another, without a time limit
+ARIMA_WORKERS = int(os.getenv("ARIMA_WORKERS", str(min(8, os.cpu_count() or 1))))
+ARIMA_FIT_TIMEOUT = float(os.getenv("ARIMA_FIT_TIMEOUT", "10"))
+ARIMA_MAXITER = int(os.getenv("ARIMA_MAXITER", "50"))
+ARIMA_SEARCH_MAX_AGE = float(os.getenv("ARIMA_SEARCH_MAX_AGE", str(7 * 24 * 3600)))
+ARIMA_DRIFT_THRESHOLD = float(os.getenv("ARIMA_DRIFT_THRESHOLD", "2.0"))
+# Refresh every category in a background thread this often; 0 disables it
+ARIMA_REFRESH_INTERVAL = float(os.getenv("ARIMA_REFRESH_INTERVAL", "0"))
+# In-sample one-step errors the drift check compares against
+DRIFT_WINDOW = 90
+MIN_OBSERVATIONS = 30
+
+def series_hash(series):
+    """Hash of a date-indexed series' dates and values"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(series.index.values, dtype="datetime64[ns]").tobytes())
+    digest.update(np.asarray(series.values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+def fit_order(series, order, maxiter=ARIMA_MAXITER):
+    with warnings.catch_warnings():
+        # Convergence is read from mle_retvals instead
+        warnings.simplefilter("ignore")
+        return ARIMA(series, order=order).fit(method_kwargs={"maxiter": maxiter})
+
+def _fit_task(values, order, maxiter):
+    """Pool task: AIC and convergence of one order. Never raises."""
+    start = time.perf_counter()
+    fit = {"order": list(order), "status": "failed", "aic": None, "seconds": None, "error": None}
+    try:
+        results = fit_order(values, order, maxiter)
+        converged = (results.mle_retvals or {}).get("converged", True)
+        aic = float(results.aic)
+        fit["status"] = "ok" if converged and np.isfinite(aic) else "not_converged"
+        fit["aic"] = aic if np.isfinite(aic) else None
+    except Exception as e:
+        fit["error"] = f"{type(e).__name__}: {e}"
+    fit["seconds"] = round(time.perf_counter() - start, 4)
+    return fit
+
+def _start_pool():
+    """
+    A process pool for one search. Forked where the platform allows it, so
+    workers do not re-import the Flask app. Only the search that started
+    it may terminate it, so a timeout in one category's search never kills
+    another's fits.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    return context.Pool(ARIMA_WORKERS)
+
+def _run_wave(pool, values, orders, maxiter):
+    """Fits of one wave, and whether any timed out (leaving pool's workers busy)"""
+    if pool is None:
+        return [_fit_task(values, order, maxiter) for order in orders], False
+
+    pending = [(order, pool.apply_async(_fit_task, (values, order, maxiter))) for order in orders]
+    # Every fit gets ARIMA_FIT_TIMEOUT seconds of a worker's time
+    deadline = time.monotonic() + ARIMA_FIT_TIMEOUT * math.ceil(len(orders) / ARIMA_WORKERS)
+    fits, timed_out = [], False
+    for order, result in pending:
+        try:
+            fits.append(result.get(max(0.0, deadline - time.monotonic())))
+        except multiprocessing.TimeoutError:
+            timed_out = True
+            fits.append({"order": list(order), "status": "timeout", "aic": None,
+                         "seconds": None, "error": f"No result within {ARIMA_FIT_TIMEOUT}s"})
+    return fits, timed_out
+
+def search_order(series, orders=ARIMA_ORDERS, maxiter=ARIMA_MAXITER):
+    """
+    AIC of every order the search reaches, lowest p + q first.
+
+    Returns:
+        list: One dict per order with "order", "status" (ok,
+        not_converged, failed, timeout or pruned), "aic", "seconds"
+        and "error"
+    """
+    values = np.asarray(series, dtype=np.float64)
+    fits = {}
+    pool = None
+    try:
+        for size in sorted({p + q for p, _, q in orders}):
+            wave = []
+            for p, d, q in (order for order in orders if order[0] + order[2] == size):
+                parents = [fits[parent] for parent in ((p - 1, d, q), (p, d, q - 1)) if parent in fits]
+                if any(parent["status"] != "ok" for parent in parents):
+                    fits[(p, d, q)] = {"order": [p, d, q], "status": "pruned", "aic": None,
+                                       "seconds": None, "error": None}
+                else:
+                    wave.append((p, d, q))
+            if not wave:
+                continue
+            if pool is None and ARIMA_WORKERS > 0:
+                pool = _start_pool()
+            wave_fits, timed_out = _run_wave(pool, values, wave, maxiter)
+            if timed_out:
+                # Workers stuck in timed-out fits; the next wave gets a fresh pool
+                pool.terminate()
+                pool = None
+            for fit in wave_fits:
+                fits[tuple(fit["order"])] = fit
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return [fits[order] for order in orders]
+
+class ArimaSearch:
+    """The chosen model for one series and how the search got there"""
+
+    def __init__(self, category, series, model, order, fits, search_seconds,
+                 searched_at=None, appended=0, drift=None):
+        self.category = category
+        self.series = series
+        self.key = series_hash(series)
+        self.model = model
+        self.order = order
+        self.fits = fits
+        self.search_seconds = search_seconds
+        self.searched_at = time.time() if searched_at is None else searched_at
+        self.appended = appended
+        self.drift = drift
+
+    def diagnostics(self):
+        return {
+            "category": self.category,
+            "series_hash": self.key,
+            "order": list(self.order),
+            "aic": float(self.model.aic),
+            "observations": len(self.series),
+            "search_seconds": self.search_seconds,
+            "searched_at": self.searched_at,
+            "appended_since_search": self.appended,
+            "drift": self.drift,
+            "fits": self.fits,
+        }
+
+def best_model(category, series):
+    """
+    Search the order grid for series and fit the winner on it.
+
+    The lowest AIC among converged fits wins; if nothing converged, the
+    lowest AIC of any fit.
+
+    Raises:
+        ValueError: No order could be fitted
+    """
+    start = time.perf_counter()
+    fits = search_order(series)
+    candidates = ([f for f in fits if f["status"] == "ok"]
+                  or [f for f in fits if f["status"] == "not_converged" and f["aic"] is not None])
+    if not candidates:
+        errors = sorted({f["error"] for f in fits if f["error"]})
+        raise ValueError(f"No ARIMA order could be fitted for {category}: {'; '.join(errors) or 'no fits ran'}")
+    order = tuple(min(candidates, key=lambda f: f["aic"])["order"])
+    # Fitted on the values alone: statsmodels cannot append to a date index
+    # without a frequency, and the sales days have gaps
+    model = fit_order(np.asarray(series, dtype=np.float64), order)
+    return ArimaSearch(category, series, model, order, fits, round(time.perf_counter() - start, 3))
+
+def extend_model(search, series):
+    """
+    search updated with the days series adds after search.series, keeping
+    the fitted parameters. None if series is not an extension of it, the
+    search is due, or the model drifted on the new days.
+    """
+    n = len(search.series)
+    if (time.time() - search.searched_at > ARIMA_SEARCH_MAX_AGE or len(series) <= n
+            or not series.iloc[:n].equals(search.series)
+            or series.index[n] <= search.series.index[-1]):
+        return None
+    new = np.asarray(series.iloc[n:], dtype=np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = search.model.append(new)
+    # The appended days' residuals are one-step forecast errors
+    new_error = np.mean(np.abs(model.resid[n:]))
+    recent_error = np.mean(np.abs(search.model.resid[-DRIFT_WINDOW:]))
+    drift = float(new_error / recent_error) if recent_error > 0 else (np.inf if new_error > 0 else 0.0)
+    if drift > ARIMA_DRIFT_THRESHOLD:
+        return None
+    return ArimaSearch(search.category, series, model, search.order, search.fits, search.search_seconds,
+                       search.searched_at, search.appended + len(new), round(drift, 4))
+
+_models = {}
+_models_lock = threading.Lock()
+_category_locks = {}
+
+def get_model(category, series):
+    """
+    The model for category on series: the cached one if series is
+    unchanged, the cached one extended if series only gained days,
+    otherwise a new search. Concurrent requests for one category wait
+    for a single update.
+
+    Returns:
+        tuple: (ArimaSearch, how it was obtained: "cached", "append" or "search")
+    """
+    key = series_hash(series)
+    with _models_lock:
+        lock = _category_locks.setdefault(category, threading.Lock())
+    with lock:
+        cached = _models.get(category)
+        if cached is not None and cached.key == key:
+            return cached, "cached"
+        search = extend_model(cached, series) if cached is not None else None
+        how = "append"
+        if search is None:
+            search, how = best_model(category, series), "search"
+        _models[category] = search
+        return search, how
+
+def refresh_all(store, min_observations=MIN_OBSERVATIONS):
+    """
+    Bring every category's model in store up to date with its series, the
+    nightly job
+
+    Returns:
+        dict: {"seconds": total, "categories": {category: "cached", "append",
+        "search", "too_short" or an error message}}
+    """
+    start = time.perf_counter()
+    outcomes = {}
+    for category in store.categories():
+        series = store.series(category)
+        if series is None or len(series) < min_observations:
+            outcomes[category] = "too_short"
+            continue
+        try:
+            outcomes[category] = get_model(category, series)[1]
+        except Exception as e:
+            outcomes[category] = f"error: {e}"
+    return {"seconds": round(time.perf_counter() - start, 3), "categories": outcomes}
+
+def start_refresh_thread(store, interval=ARIMA_REFRESH_INTERVAL):
+    """Run refresh_all every interval seconds in a daemon thread (not if interval is 0)"""
+    if interval <= 0:
+        return None
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                refresh_all(store)
+            except Exception:
+                pass  # The sales file may be missing or mid-rewrite; try again next time
+
+    thread = threading.Thread(target=loop, name="arima-refresh", daemon=True)
+    thread.start()
+    return thread
+
+def cached_models():
+    """Diagnostics of every cached model: {category: diagnostics}"""
+    return {category: search.diagnostics() for category, search in list(_models.items())}
@@ -0,0 +1,66 @@
+"""
+The nightly forecast refresh: every category's model brought up to date
+after a day of new sales, by appending to the fitted state against
+rerunning the order search, on synthetic daily series.
+
+Run from the repository root:
+
+    python DashBoard/bench_arima_refresh.py [--categories 15] [--days 1000] [--new-days 1]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import arima_search
+
+class SeriesStore:
+    """The part of SalesStore refresh_all uses, over fixed series"""
+
+    def __init__(self, series):
+        self._series = series
+
+    def categories(self):
+        return sorted(self._series)
+
+    def series(self, category):
+        return self._series[category]
+
+def daily_sales(days, rng):
+    """Weekly seasonality and an AR(1) wander around a level"""
+    noise = np.zeros(days)
+    for t in range(1, days):
+        noise[t] = 0.7 * noise[t - 1] + rng.normal(0, 3)
+    t = np.arange(days)
+    values = np.maximum(0, np.round(40 + 8 * np.sin(2 * np.pi * t / 7) + noise))
+    return pd.Series(values.astype(np.int64), index=pd.date_range("2019-01-01", periods=days, freq="D"),
+                     name="qty_ordered")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", type=int, default=15)
+    parser.add_argument("--days", type=int, default=1000)
+    parser.add_argument("--new-days", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    full = {f"Category {i}": daily_sales(args.days + args.new_days, rng) for i in range(args.categories)}
+    print(f"{args.categories} categories, {args.days} days each, {arima_search.ARIMA_WORKERS} workers")
+
+    store = SeriesStore({category: series.iloc[:args.days] for category, series in full.items()})
+    result = arima_search.refresh_all(store)
+    print(f"  {'initial search':<28} {result['seconds']:8.2f} s")
+
+    store = SeriesStore(full)
+    result = arima_search.refresh_all(store)
+    outcomes = pd.Series(result["categories"]).value_counts().to_dict()
+    print(f"  {'+' + str(args.new_days) + ' day(s), append':<28} {result['seconds']:8.2f} s  {outcomes}")
+
+    # What every refresh cost before: the full search for each category
+    arima_search._models.clear()
+    result = arima_search.refresh_all(store)
+    outcomes = pd.Series(result["categories"]).value_counts().to_dict()
+    print(f"  {'full search':<28} {result['seconds']:8.2f} s  {outcomes}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+The /api/sales_forecast series lookup: re-reading sales_data.csv per
+request against the in-memory SalesStore, on a synthetic sales file.
+Also times a cold load, a restart from the Parquet copy, and an
+incremental refresh after rows are appended.
+
+Run from the repository root:
+
+    python DashBoard/bench_sales_store.py [--rows 3000000] [--days 1500] [--categories 15]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from sales_store import SalesStore
+
+def write_sales(path, rows, days, categories, rng, start_day=0, header=True):
+    """Sales rows in the shape of sales_data.csv, with a few extra columns"""
+    dates = pd.Timestamp("2018-01-01") + pd.to_timedelta(rng.integers(start_day, start_day + days, rows), unit="D")
+    df = pd.DataFrame({
+        "item_id": rng.integers(1, 10**6, rows),
+        "order_date": dates.strftime("%Y-%m-%d"),
+        "category": np.array([f"Category {i}" for i in range(categories)])[rng.integers(categories, size=rows)],
+        "qty_ordered": rng.integers(1, 5, rows),
+        "price": rng.uniform(1, 500, rows).round(2),
+        "status": "complete",
+    })
+    df.to_csv(path, mode="w" if header else "a", header=header, index=False)
+
+def old_lookup(path, category):
+    """What sales_forecast did before the store, on every request"""
+    df_sales = pd.read_csv(path)
+    df_sales['order_date'] = pd.to_datetime(df_sales['order_date'])
+    df_daily = df_sales.groupby(['order_date', 'category']).agg({'qty_ordered': 'sum'}).reset_index()
+    df_daily.set_index('order_date', inplace=True)
+    return df_daily[df_daily['category'] == category]['qty_ordered']
+
+def timed_peak(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=3000000)
+    parser.add_argument("--days", type=int, default=1500)
+    parser.add_argument("--categories", type=int, default=15)
+    parser.add_argument("--append", type=int, default=20000, help="rows appended for the incremental refresh")
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sales_data.csv")
+        write_sales(path, args.rows, args.days, args.categories, rng)
+        print(f"{args.rows} rows, {os.path.getsize(path) / 1e6:.0f} MB, "
+              f"{args.categories} categories over {args.days} days")
+        category = "Category 0"
+
+        expected, seconds, peak = timed_peak(lambda: old_lookup(path, category))
+        print(f"  {'re-read per request (old)':<28} {seconds * 1e3:10.1f} ms/lookup, peak {peak / 1e6:.0f} MB")
+
+        cache_dir = os.path.join(tmp, "store")
+        store = SalesStore(path, cache_dir)
+        _, seconds, peak = timed_peak(store.refresh)
+        print(f"  {'store: cold load':<28} {seconds * 1e3:10.1f} ms, peak {peak / 1e6:.0f} MB, "
+              f"resident {store.stats()['memory_bytes'] / 1e6:.2f} MB")
+        assert store.series(category).equals(expected)
+
+        start = time.perf_counter()
+        for _ in range(args.lookups):
+            store.series(category)
+        print(f"  {'store: lookup':<28} {(time.perf_counter() - start) / args.lookups * 1e6:10.1f} us/lookup")
+
+        restarted = SalesStore(path, cache_dir)
+        kind, seconds, _ = timed_peak(restarted.refresh)
+        print(f"  {'store: restart (' + kind + ')':<28} {seconds * 1e3:10.1f} ms")
+
+        write_sales(path, args.append, 30, args.categories, rng, start_day=args.days - 10, header=False)
+        kind, seconds, _ = timed_peak(store.refresh)
+        print(f"  {'store: +' + str(args.append) + ' rows (' + kind + ')':<28} {seconds * 1e3:10.1f} ms")
+        assert store.series(category).equals(old_lookup(path, category))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Recall and latency of the /api/query vector indexes against the exact
+baseline, on synthetic clustered embeddings (or a cached table).
+
+Run from the repository root:
+
+    python DashBoard/bench_vector_index.py [--rows 500000] [--dim 384] [--queries 200] [--nprobe 4 8 16 32]
+    python DashBoard/bench_vector_index.py --table orders
+"""
+import argparse
+import time
+
+import numpy as np
+
+from vector_index import ExactIndex, IVFIndex
+
+def clustered_vectors(rows, dim, clusters, spread, rng):
+    """Gaussian blobs around random directions, like topic clusters of sentence embeddings"""
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = np.empty((rows, dim), dtype=np.float32)
+    for start in range(0, rows, 100000):
+        n = min(100000, rows - start)
+        labels = rng.integers(clusters, size=n)
+        vectors[start:start + n] = centers[labels] + spread * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors
+
+def per_query_ms(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query[None, :])
+    return (time.perf_counter() - start) / len(queries) * 1e3
+
+def recall(found, truth):
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--spread", type=float, default=1.5,
+                        help="noise around cluster centres; higher means more overlap and lower recall")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--table", help="use a cached knowledge base table instead of synthetic data")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.table:
+        from knowledge_base import load_csvs, load_embeddings
+        vectors = np.asarray(load_embeddings(load_csvs(), [args.table])[0][args.table])
+        # Perturbed rows stand in for queries about them
+        queries = vectors[rng.choice(len(vectors), args.queries)] + 0.1 * rng.normal(
+            size=(args.queries, vectors.shape[1])).astype(np.float32)
+    else:
+        vectors = clustered_vectors(args.rows + args.queries, args.dim, args.clusters, args.spread, rng)
+        vectors, queries = vectors[:args.rows], vectors[args.rows:]
+    print(f"{len(vectors)} vectors of dim {vectors.shape[1]}, {len(queries)} queries, k={args.k}")
+
+    # The previous /api/query: raw dot products and a full argsort per table
+    baseline = per_query_ms(lambda q: np.argsort(-(vectors @ q.T).ravel())[:args.k], queries)
+    print(f"  {'dot + argsort (old)':<24} {baseline:8.2f} ms/query")
+
+    start = time.perf_counter()
+    exact = ExactIndex(vectors)
+    build = time.perf_counter() - start
+    truth = exact.search(queries, args.k)[1]
+    exact_ms = per_query_ms(lambda q: exact.search(q, args.k), queries)
+    batch_start = time.perf_counter()
+    exact.search(queries, args.k)
+    batch_ms = (time.perf_counter() - batch_start) / len(queries) * 1e3
+    print(f"  {'exact':<24} {exact_ms:8.2f} ms/query ({batch_ms:.2f} batched), build {build:.1f}s, recall 1.000")
+
+    start = time.perf_counter()
+    ivf = IVFIndex(vectors)
+    build = time.perf_counter() - start
+    print(f"  ivf: {ivf.nlist} lists, build {build:.1f}s")
+    for nprobe in args.nprobe:
+        found = ivf.search(queries, args.k, nprobe=nprobe)[1]
+        ms = per_query_ms(lambda q: ivf.search(q, args.k, nprobe=nprobe), queries)
+        print(f"  {'ivf nprobe=' + str(nprobe):<24} {ms:8.2f} ms/query, recall {recall(found, truth):.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+def row_texts(df, columns):
+    """The text embedded for each row: the columns joined by spaces"""
+    # Same strings as df[columns].agg(" ".join, axis=1), without a Python call per row
+    parts = [df[column].fillna("").astype(str) for column in columns]
+    return parts[0].str.cat(parts[1:], sep=" ").tolist()
+
+def text_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+class EmbeddingCache:
+    """
+    Per-table embedding store on disk, keyed by a hash of each row's text.
+
+    For a table ``name`` the directory holds:
+        name.npy        float32 matrix, one row per table row
+        name.keys.npy   hex text hash of each row, same order
+        name.meta.json  model and columns the vectors were made with
+
+    load() memory-maps the matrix when every row is unchanged. Otherwise
+    it re-encodes only the rows whose text hash is not in the cache, then
+    rewrites the files.
+    """
+
+    def __init__(self, directory, model_name):
+        self.directory = directory
+        self.model_name = model_name
+
+    def _paths(self, name):
+        base = os.path.join(self.directory, name)
+        return base + ".npy", base + ".keys.npy", base + ".meta.json"
+
+    def _read(self, name, columns):
+        """(vectors, keys) from disk, or (None, None) if absent or stale"""
+        vectors_path, keys_path, meta_path = self._paths(name)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model_name or meta.get("columns") != list(columns):
+                return None, None
+            vectors = np.load(vectors_path, mmap_mode="r")
+            keys = np.load(keys_path)
+        except (OSError, ValueError):
+            return None, None
+        if len(vectors) != len(keys):
+            return None, None
+        return vectors, keys
+
+    def _write(self, name, columns, vectors, keys):
+        os.makedirs(self.directory, exist_ok=True)
+        vectors_path, keys_path, meta_path = self._paths(name)
+        # Write to temporary names and rename, so readers never see half a file
+        for path, array in ((vectors_path, vectors), (keys_path, keys)):
+            tmp = path + ".tmp.npy"
+            np.save(tmp, array)
+            os.replace(tmp, path)
+        tmp = meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"model": self.model_name, "columns": list(columns),
+                       "rows": len(keys), "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0}, f)
+        os.replace(tmp, meta_path)
+
+    def load(self, name, df, columns, encode, force=False):
+        """
+        Embeddings for every row of df, from the cache where possible.
+
+        Args:
+            name: Table name, used for the file names
+            df: DataFrame to embed
+            columns: Columns joined into each row's text
+            encode: Function from a list of texts to an (n, dim) array
+            force: Re-encode every row
+
+        Returns:
+            tuple: (float32 array, memory-mapped if nothing changed;
+            number of rows that had to be encoded)
+        """
+        texts = row_texts(df, columns)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32), 0
+        keys = np.array([text_hash(t) for t in texts], dtype="U32")
+
+        cached, cached_keys = (None, None) if force else self._read(name, columns)
+        if cached is not None and np.array_equal(cached_keys, keys):
+            return cached, 0
+
+        position = {} if cached is None else {k: i for i, k in enumerate(cached_keys.tolist())}
+        missing = [i for i, k in enumerate(keys.tolist()) if k not in position]
+        encoded = None
+        if missing:
+            encoded = np.asarray(encode([texts[i] for i in missing]), dtype=np.float32)
+        dim = encoded.shape[1] if encoded is not None else cached.shape[1]
+
+        vectors = np.empty((len(texts), dim), dtype=np.float32)
+        if encoded is not None:
+            vectors[missing] = encoded
+        reused = [(i, position[k]) for i, k in enumerate(keys.tolist()) if k in position]
+        if reused:
+            rows, sources = map(list, zip(*reused))
+            vectors[rows] = cached[sources]
+
+        self._write(name, columns, vectors, keys)
+        return np.load(self._paths(name)[0], mmap_mode="r"), len(missing)
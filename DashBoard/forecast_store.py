@@ -0,0 +1,148 @@
+"""
+Precomputed sales forecasts, one file per category, served from memory.
+
+Every ``<category>_forecast_arima.csv`` (columns date, forecast_sales) in
+FORECAST_DIR is read into a date-sorted array pair per category. Reads
+re-scan the directory at most every FORECAST_CHECK_SECONDS and reload
+only files that were added or changed (by mtime or size), so new
+forecasts are picked up without a restart. Writers should write to a
+temporary name and rename, so a half-written file is never read; a file
+that fails to parse keeps its previous forecast.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+FORECAST_DIR = os.getenv("FORECAST_DIR", os.path.join("sales_prediction_chatbot", "sales_arima"))
+FORECAST_SUFFIX = "_forecast_arima.csv"
+FORECAST_CHECK_SECONDS = float(os.getenv("FORECAST_CHECK_SECONDS", "1"))
+
+# Bucket labels for aggregate(): each bucket is dated by its first day
+AGGREGATE_PERIODS = {"day": "D", "week": "W", "month": "M"}
+
+class ForecastStore:
+    """{category: (dates, forecast_sales)} over a directory of forecast files"""
+
+    def __init__(self, directory=FORECAST_DIR, check_seconds=FORECAST_CHECK_SECONDS):
+        self.directory = directory
+        self.check_seconds = check_seconds
+        self._forecasts = {}
+        self._files = {}
+        self._checked = None
+        self._lock = threading.Lock()
+        self.errors = {}
+        self.last_reload = None
+
+    @staticmethod
+    def _read(path):
+        df = pd.read_csv(path, usecols=["date", "forecast_sales"])
+        dates = pd.to_datetime(df["date"]).values.astype("datetime64[D]")
+        values = df["forecast_sales"].to_numpy(dtype=np.float64)
+        order = np.argsort(dates, kind="stable")
+        dates, values = dates[order], values[order]
+        # A date listed twice keeps its last value
+        last = np.append(dates[1:] != dates[:-1], True)
+        return dates[last], values[last]
+
+    def refresh(self, force=False):
+        """
+        Reload files added or changed since the last scan and drop removed
+        ones.
+
+        Returns:
+            list: Categories reloaded or dropped
+        """
+        now = time.monotonic()
+        if not force and self._checked is not None and now - self._checked < self.check_seconds:
+            return []
+        with self._lock:
+            if not force and self._checked is not None and now - self._checked < self.check_seconds:
+                return []
+            start = time.perf_counter()
+            files = {}
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith(FORECAST_SUFFIX):
+                        stat = entry.stat()
+                        files[entry.name[:-len(FORECAST_SUFFIX)]] = (entry.path, stat.st_mtime_ns, stat.st_size)
+
+            forecasts = dict(self._forecasts)
+            changed = [category for category in self._files if category not in files]
+            for category in changed:
+                forecasts.pop(category, None)
+                self.errors.pop(category, None)
+            for category, key in files.items():
+                if not force and self._files.get(category) == key:
+                    continue
+                try:
+                    forecasts[category] = self._read(key[0])
+                    self.errors.pop(category, None)
+                except (OSError, ValueError, KeyError) as e:
+                    self.errors[category] = f"{type(e).__name__}: {e}"
+                changed.append(category)
+            # Swapped in whole, so readers never see a partial reload
+            self._forecasts = forecasts
+            self._files = files
+            self._checked = time.monotonic()
+            if changed:
+                self.last_reload = {"categories": sorted(changed),
+                                    "seconds": round(time.perf_counter() - start, 4)}
+            return changed
+
+    def categories(self):
+        self.refresh()
+        return sorted(self._forecasts)
+
+    def get(self, category, start=None, end=None, days=None):
+        """
+        Forecast for category between start and end (inclusive dates), and
+        at most days values from the first one, or None for an unknown
+        category
+
+        Returns:
+            pandas.Series: forecast_sales indexed by date
+        """
+        self.refresh()
+        forecast = self._forecasts.get(category)
+        if forecast is None:
+            return None
+        dates, values = forecast
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "D"), side="left")
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, "D"), side="right")
+        if days is not None:
+            hi = min(hi, lo + days)
+        return pd.Series(values[lo:hi], index=pd.DatetimeIndex(dates[lo:hi], name="date"), name="forecast_sales")
+
+    def stats(self):
+        return {
+            "directory": self.directory,
+            "categories": len(self._forecasts),
+            "last_reload": self.last_reload,
+            "errors": dict(self.errors),
+        }
+
+def aggregate(forecast, period):
+    """Sum of a forecast series per day, week or month, dated by each bucket's start"""
+    if period not in AGGREGATE_PERIODS:
+        raise ValueError(f"Unknown aggregate {period!r}; expected one of {sorted(AGGREGATE_PERIODS)}.")
+    if period == "day" or forecast.empty:
+        return forecast
+    periods = forecast.index.to_period(AGGREGATE_PERIODS[period])
+    summed = forecast.groupby(periods).sum()
+    summed.index = summed.index.start_time.rename("date")
+    return summed
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_forecast_store():
+    """The process-wide store over FORECAST_DIR, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ForecastStore()
+    return _store
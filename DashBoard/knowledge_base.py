@@ -0,0 +1,173 @@
+"""
+Tables behind the dashboard chatbot and their sentence embeddings.
+
+Rebuild the embedding cache offline (from the repository root):
+
+    python DashBoard/knowledge_base.py [--force] [--tables orders shipments products]
+"""
+import argparse
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from embedding_cache import EmbeddingCache
+
+KNOWLEDGE_BASE_DIR = os.getenv("KNOWLEDGE_BASE_DIR", os.path.join("Databases", "Chatbot_Knowledge_base"))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(KNOWLEDGE_BASE_DIR, "embeddings"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# Table name -> (CSV file, columns joined into the embedded text)
+EMBEDDED_TABLES = {
+    "orders": ("orders.csv", ["Order ID", "Customer Name", "Product Description", "Order Status"]),
+    "shipments": ("shipments.csv", ["Tracking ID", "Shipping Address", "Shipment Status", "Product Description"]),
+    "products": ("products.csv", ["Product ID", "Product Name", "Product Description", "Price", "Product Category"]),
+}
+INVENTORY_CSV = "category_stock_inventoryy.csv"
+
+# Identifier columns answered by exact lookup instead of vector search
+ID_COLUMNS = {
+    "orders": ["Order ID", "Tracking ID", "Product ID"],
+    "shipments": ["Order ID", "Tracking ID", "Product ID"],
+    "products": ["Product ID", "SKU"],
+}
+ID_TOKEN = re.compile(r"[A-Za-z0-9]{5,}")
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "4096"))
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """The SentenceTransformer, loaded on first use"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(EMBEDDING_MODEL)
+    return _model
+
+def encode(texts):
+    return get_model().encode(texts, convert_to_tensor=True).cpu().numpy()
+
+class QueryEmbeddingCache:
+    """LRU of query text -> embedding; misses are encoded in one call"""
+
+    def __init__(self, encode_fn, maxsize=QUERY_CACHE_SIZE):
+        self.encode_fn = encode_fn
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, texts):
+        """(len(texts), dim) float32 array"""
+        found, missing = {}, []
+        with self._lock:
+            for text in texts:
+                if text in self._cache:
+                    self._cache.move_to_end(text)
+                    found[text] = self._cache[text]
+                elif text not in missing:
+                    missing.append(text)
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            encoded = np.asarray(self.encode_fn(missing), dtype=np.float32)
+            with self._lock:
+                for text, vector in zip(missing, encoded):
+                    found[text] = vector
+                    self._cache[text] = vector
+                    if len(self._cache) > self.maxsize:
+                        self._cache.popitem(last=False)
+        return np.stack([found[text] for text in texts])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache),
+                    "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+_query_cache = QueryEmbeddingCache(lambda texts: encode(texts))
+
+def encode_queries(texts):
+    return _query_cache.encode(texts)
+
+def query_cache_stats():
+    return _query_cache.stats()
+
+class IdIndex:
+    """
+    Hash index from identifier values (Order ID, Tracking ID, Product ID,
+    SKU) to row positions in each table. Matching ignores case.
+    """
+
+    def __init__(self, tables, id_columns=ID_COLUMNS):
+        self.index = {}
+        for name, columns in id_columns.items():
+            df = tables[name]
+            for column in columns:
+                values = df[column].astype(str).str.upper().tolist()
+                for position, value in enumerate(values):
+                    self.index.setdefault(value, {}).setdefault(name, []).append(position)
+
+    def lookup(self, text):
+        """
+        Identifiers found in text and the rows they name
+
+        Returns:
+            tuple: (list of matched ids, {table: sorted row positions})
+        """
+        ids, rows = [], {}
+        for token in ID_TOKEN.findall(text):
+            hit = self.index.get(token.upper())
+            if hit is None:
+                continue
+            ids.append(token)
+            for name, positions in hit.items():
+                rows.setdefault(name, set()).update(positions)
+        return ids, {name: sorted(positions) for name, positions in rows.items()}
+
+def load_csvs():
+    """Every knowledge base table, read once: {"orders": df, ..., "inventory": df}"""
+    tables = {name: pd.read_csv(os.path.join(KNOWLEDGE_BASE_DIR, csv))
+              for name, (csv, _) in EMBEDDED_TABLES.items()}
+    tables["inventory"] = pd.read_csv(os.path.join(KNOWLEDGE_BASE_DIR, INVENTORY_CSV))
+    return tables
+
+def load_embeddings(tables, names=None, force=False):
+    """
+    Embeddings for the given tables (all embedded tables by default),
+    encoding only rows the cache has not seen
+
+    Returns:
+        tuple: ({name: array}, {name: rows encoded})
+    """
+    cache = EmbeddingCache(EMBEDDING_CACHE_DIR, EMBEDDING_MODEL)
+    embeddings, encoded = {}, {}
+    for name in names or EMBEDDED_TABLES:
+        _, columns = EMBEDDED_TABLES[name]
+        embeddings[name], encoded[name] = cache.load(name, tables[name], columns, encode, force)
+    return embeddings, encoded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", nargs="+", choices=list(EMBEDDED_TABLES), default=list(EMBEDDED_TABLES))
+    parser.add_argument("--force", action="store_true", help="re-encode every row")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tables = load_csvs()
+    embeddings, encoded = load_embeddings(tables, args.tables, args.force)
+    for name in args.tables:
+        print(f"{name}: {len(embeddings[name])} rows, {encoded[name]} encoded")
+    print(f"Cache in {EMBEDDING_CACHE_DIR}, {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
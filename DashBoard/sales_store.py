@@ -0,0 +1,217 @@
+"""
+Daily sales per category, held in memory for the forecasts.
+
+The raw sales file is parsed once. The daily totals are kept as one
+series per category and persisted as Parquet, so a restart only reads
+the columnar copy. When the file changes, rows appended after the part
+already read are parsed and added in; any other change rebuilds from
+scratch.
+
+Build or refresh the Parquet copy offline (from the repository root):
+
+    python DashBoard/sales_store.py [--force]
+"""
+import argparse
+import io
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+SALES_DATA_CSV = os.getenv("SALES_DATA_CSV", "sales_data.csv")
+SALES_STORE_DIR = os.getenv("SALES_STORE_DIR", "sales_store")
+SALES_COLUMNS = ["order_date", "category", "qty_ordered"]
+
+# Bytes before the read offset that must be unchanged for an append to be
+# read incrementally
+TAIL_CHECK_BYTES = 4096
+
+class SalesStore:
+    """
+    {category: daily qty_ordered series} for one sales CSV.
+
+    series() checks the file's mtime and size on every call (one stat)
+    and refreshes before answering if either changed.
+    """
+
+    def __init__(self, csv_path=SALES_DATA_CSV, cache_dir=SALES_STORE_DIR):
+        self.csv_path = csv_path
+        self.cache_dir = cache_dir
+        self._series = {}
+        self._stat = None
+        self._offset = 0
+        self._tail = b""
+        self._lock = threading.Lock()
+        self.last_refresh = None
+
+    def _cache_paths(self):
+        base = os.path.join(self.cache_dir, os.path.splitext(os.path.basename(self.csv_path))[0])
+        return base + ".daily.parquet", base + ".meta.json"
+
+    def _read_tail(self, offset):
+        with open(self.csv_path, "rb") as f:
+            f.seek(max(0, offset - TAIL_CHECK_BYTES))
+            return f.read(min(offset, TAIL_CHECK_BYTES))
+
+    def _appended(self, size, offset, tail):
+        """True if the file only grew past offset, whose last bytes were tail"""
+        return (offset > 0 and size > offset and tail.endswith(b"\n")
+                and self._read_tail(offset) == tail)
+
+    @staticmethod
+    def _daily(df):
+        df = df[SALES_COLUMNS].copy()
+        df["order_date"] = pd.to_datetime(df["order_date"])
+        return df.groupby(["order_date", "category"], as_index=False)["qty_ordered"].sum()
+
+    def _set_daily(self, daily):
+        self._series = {category: group.set_index("order_date")["qty_ordered"]
+                        for category, group in daily.groupby("category", sort=False)}
+
+    def _daily_frame(self):
+        if not self._series:
+            return pd.DataFrame(columns=SALES_COLUMNS)
+        return pd.concat([series.reset_index().assign(category=category)
+                          for category, series in self._series.items()], ignore_index=True)[SALES_COLUMNS]
+
+    def _load_full(self, stat):
+        daily = self._daily(pd.read_csv(self.csv_path, usecols=SALES_COLUMNS))
+        self._set_daily(daily)
+        self._offset = stat.st_size
+        self._tail = self._read_tail(self._offset)
+        return daily
+
+    def _load_appended(self, stat):
+        with open(self.csv_path, "rb") as f:
+            header = f.readline()
+            f.seek(self._offset)
+            data = f.read(stat.st_size - self._offset)
+        # A writer may be mid-line; leave the partial last line for next time
+        data = data[:data.rfind(b"\n") + 1]
+        if data:
+            new = self._daily(pd.read_csv(io.BytesIO(header + data), usecols=SALES_COLUMNS))
+            daily = (pd.concat([self._daily_frame(), new], ignore_index=True)
+                     .groupby(["order_date", "category"], as_index=False)["qty_ordered"].sum())
+            self._set_daily(daily)
+            self._offset += len(data)
+            self._tail = self._read_tail(self._offset)
+        return len(data)
+
+    def _load_cache(self, stat):
+        """Restore from the Parquet copy; False if it is missing or stale"""
+        parquet_path, meta_path = self._cache_paths()
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            offset, tail = meta["offset"], bytes.fromhex(meta["tail"])
+            if meta["source"] != os.path.abspath(self.csv_path) or stat.st_size < offset:
+                return False
+            if ((stat.st_size != offset or stat.st_mtime_ns != meta["mtime_ns"])
+                    and not self._appended(stat.st_size, offset, tail)):
+                return False
+            daily = pd.read_parquet(parquet_path)
+        except (OSError, ValueError, KeyError, ImportError):
+            return False
+        # Only once the copy is read: a failed restore must leave the offset
+        # at 0, so refresh() reads the whole file rather than just its end
+        self._offset, self._tail = offset, tail
+        self._set_daily(daily)
+        return True
+
+    def _save_cache(self, daily, stat):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            parquet_path, meta_path = self._cache_paths()
+            # Write to temporary names and rename, so readers never see half a file
+            daily.to_parquet(parquet_path + ".tmp", index=False)
+            os.replace(parquet_path + ".tmp", parquet_path)
+            with open(meta_path + ".tmp", "w") as f:
+                json.dump({"source": os.path.abspath(self.csv_path), "offset": self._offset,
+                           "mtime_ns": stat.st_mtime_ns, "tail": self._tail.hex()}, f)
+            os.replace(meta_path + ".tmp", meta_path)
+        except ImportError:
+            pass  # No Parquet engine (pyarrow); the store still works, without the copy
+
+    def refresh(self, force=False):
+        """
+        Bring the series up to date with the file.
+
+        Returns:
+            str: What was done: "unchanged", "cache", "append" or "full"
+        """
+        with self._lock:
+            stat = os.stat(self.csv_path)
+            key = (stat.st_mtime_ns, stat.st_size)
+            if key == self._stat and not force:
+                return "unchanged"
+            start = time.perf_counter()
+            daily = None
+            if self._stat is None and not force and self._load_cache(stat):
+                kind = "cache"
+                if stat.st_size > self._offset:
+                    # Rows appended since the copy was written
+                    self._load_appended(stat)
+                    daily = self._daily_frame()
+            elif not force and self._appended(stat.st_size, self._offset, self._tail):
+                kind = "append"
+                self._load_appended(stat)
+                daily = self._daily_frame()
+            else:
+                kind = "full"
+                daily = self._load_full(stat)
+            if daily is not None:
+                self._save_cache(daily, stat)
+            self._stat = key
+            self.last_refresh = {"kind": kind, "seconds": round(time.perf_counter() - start, 4)}
+            return kind
+
+    def series(self, category):
+        """Daily qty_ordered for category indexed by order_date, or None"""
+        self.refresh()
+        return self._series.get(category)
+
+    def categories(self):
+        self.refresh()
+        return sorted(self._series)
+
+    def stats(self):
+        series = list(self._series.values())
+        return {
+            "source": self.csv_path,
+            "categories": len(series),
+            "days": sum(len(s) for s in series),
+            "memory_bytes": sum(int(s.memory_usage(index=True, deep=True)) for s in series),
+            "offset": self._offset,
+            "last_refresh": self.last_refresh,
+        }
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_sales_store():
+    """The process-wide store over SALES_DATA_CSV, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SalesStore()
+    return _store
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=SALES_DATA_CSV)
+    parser.add_argument("--force", action="store_true", help="re-read the whole file")
+    args = parser.parse_args()
+
+    store = SalesStore(args.csv)
+    kind = store.refresh(force=args.force)
+    stats = store.stats()
+    print(f"{args.csv}: {kind} in {stats['last_refresh']['seconds']}s, "
+          f"{stats['categories']} categories, {stats['days']} category-days, "
+          f"{stats['memory_bytes'] / 1e6:.1f} MB")
+    print(f"Parquet copy in {SALES_STORE_DIR}")
+
+if __name__ == "__main__":
+    main()
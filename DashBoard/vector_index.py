@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+
+# Tables up to this many rows are searched exactly; the IVF index pays off
+# once a full scan costs more than probing a few lists
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "auto")
+AUTO_EXACT_MAX = int(os.getenv("VECTOR_INDEX_EXACT_MAX", "200000"))
+
+def normalize(vectors):
+    """Float32 copy of vectors scaled to unit length (zero rows stay zero)"""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    vectors /= norms
+    return vectors
+
+def top_k(scores, k):
+    """
+    Indices and scores of the k largest entries in each row of scores,
+    best first, without sorting whole rows
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((len(scores), 0), dtype=np.float32), np.empty((len(scores), 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(scores.shape[1]), scores.shape).copy()
+    part = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-part, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(idx, order, axis=1)
+
+class VectorIndex:
+    """
+    Cosine-similarity search over one table's embeddings.
+
+    search() takes an (m, d) array of queries (or one (d,) vector) and
+    returns (scores, indices), each (m, k), best match first.
+    """
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def search(self, queries, k=3):
+        raise NotImplementedError
+
+class ExactIndex(VectorIndex):
+    """Every vector scored with one matrix multiply"""
+
+    def __init__(self, vectors):
+        self.vectors = normalize(vectors)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, queries, k=3):
+        return top_k(normalize(queries) @ self.vectors.T, k)
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted file index: vectors are clustered by spherical k-means and a
+    query only scores the vectors in the ``nprobe`` clusters whose
+    centroids are closest to it. Approximate; raise nprobe for recall.
+    """
+
+    def __init__(self, vectors, nlist=None, nprobe=8, iterations=10, sample_size=50000, seed=0):
+        self.vectors = normalize(vectors)
+        n = len(self.vectors)
+        self.nlist = max(1, min(nlist or int(4 * np.sqrt(n)), n))
+        self.nprobe = nprobe
+        rng = np.random.default_rng(seed)
+
+        sample = self.vectors[rng.choice(n, size=min(n, sample_size), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=self.nlist, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=self.nlist) == 0
+            # Empty clusters restart from random sample points
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = normalize(sums)
+        self.centroids = centroids
+
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 65536):
+            assign[start:start + 65536] = np.argmax(self.vectors[start:start + 65536] @ centroids.T, axis=1)
+        # Vectors grouped by cluster, so each list is one contiguous slice
+        self.order = np.argsort(assign, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=self.nlist))])
+        self.vectors = self.vectors[self.order]
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, queries, k=3, nprobe=None):
+        queries = normalize(queries)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        _, probes = top_k(queries @ self.centroids.T, nprobe)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        for i, (query, lists) in enumerate(zip(queries, probes)):
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in lists])
+            if not len(rows):
+                continue
+            s, j = top_k((self.vectors[rows] @ query)[None, :], k)
+            scores[i, :s.shape[1]] = s[0]
+            indices[i, :s.shape[1]] = self.order[rows[j[0]]]
+        return scores, indices
+
+VECTOR_INDEX_BACKENDS = {"exact": ExactIndex, "ivf": IVFIndex}
+
+def build_index(vectors, backend=None, **kwargs):
+    """
+    Index over vectors. backend is "exact", "ivf" or "auto" (exact up to
+    AUTO_EXACT_MAX rows); defaults to VECTOR_INDEX_BACKEND.
+    """
+    backend = backend or VECTOR_INDEX_BACKEND
+    if backend == "auto":
+        backend = "exact" if len(vectors) <= AUTO_EXACT_MAX else "ivf"
+    if backend not in VECTOR_INDEX_BACKENDS:
+        raise ValueError(f"Unknown vector index backend {backend!r}; "
+                         f"expected one of {sorted(VECTOR_INDEX_BACKENDS)} or 'auto'.")
+    return VECTOR_INDEX_BACKENDS[backend](vectors, **kwargs)
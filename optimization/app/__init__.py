@@ -1,12 +1,13 @@
 from flask import Flask
-from config.settings import DATABASE_URI
-from models.database import db
+from config.config import DATABASE_URI
+from models.database import db, configure_sqlite, ensure_indexes, migrate_route_geometry
+from app.chatbot import start_chatbot
 
-def create_app():
+def create_app(database_uri=DATABASE_URI):
     app = Flask(__name__)
 
     # Configure the app with the database
-    app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URI
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_uri
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
     # Initialize database
@@ -14,6 +15,21 @@ def create_app():
 
     # Create tables
     with app.app_context():
+        configure_sqlite(db.engine)
         db.create_all()
+        ensure_indexes()
 
-    return app
\ No newline at end of file
+    from app.routes import bp
+    app.register_blueprint(bp)
+
+    # Loads the chatbot model now, in the background, or not at all,
+    # depending on CHATBOT_MODEL_MODE
+    start_chatbot()
+
+    @app.cli.command("migrate-route-geometry")
+    def migrate_route_geometry_command():
+        """Convert stored routes from str(list) to encoded polylines."""
+        converted, failed = migrate_route_geometry()
+        print(f"Converted {converted} routes; {len(failed)} could not be parsed: {failed[:20]}")
+
+    return app
@@ -0,0 +1,92 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class MicroBatcher:
+    """
+    Collect concurrent calls into batches for a function that is cheaper
+    per item when given many items at once.
+
+    ``fn`` takes a list of items and returns a list of results in the same
+    order. A batch is dispatched when it reaches ``max_batch_size`` or
+    when its oldest item has waited ``max_wait_ms``, whichever comes
+    first. Calls block until their own result is ready.
+    """
+
+    def __init__(self, fn, max_batch_size=8, max_wait_ms=10.0, name="micro-batcher"):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.queue_seconds_total = 0.0
+        self.queue_seconds_max = 0.0
+        self.batch_sizes = {}
+        self._worker = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Anything that queued up behind the previous batch goes in even
+            # if its deadline has passed; only then wait for stragglers
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _record(self, batch, started):
+        waits = [started - enqueued for _, _, enqueued in batch]
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.queue_seconds_total += sum(waits)
+            self.queue_seconds_max = max(self.queue_seconds_max, max(waits))
+            self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            self._record(batch, started)
+            try:
+                results = self.fn([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch function returned {len(results)} results for {len(batch)} items.")
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "mean_batch_fill": round(self.items / self.batches / self.max_batch_size, 4) if self.batches else 0.0,
+                "mean_queue_ms": round(self.queue_seconds_total / self.items * 1000, 3) if self.items else 0.0,
+                "max_queue_ms": round(self.queue_seconds_max * 1000, 3),
+                "batch_size_counts": dict(sorted(self.batch_sizes.items())),
+                "pending": self._queue.qsize(),
+            }
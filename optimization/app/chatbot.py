@@ -1,14 +1,134 @@
-from transformers import pipeline
+import os
+import threading
+import time
 
-# Hugging Face model pipeline for chatbot
-chatbot_pipeline = pipeline("text2text-generation", model="facebook/bart-large-cnn")
+from app.batching import MicroBatcher
+from utils.metrics import register_collector
+
+CHATBOT_MODEL = os.getenv("CHATBOT_MODEL", "facebook/bart-large-cnn")
+# When the ~1.6 GB model is loaded:
+#   lazy        on the first chatbot request (default)
+#   background  in a thread started by create_app; templates until ready
+#   eager       inside create_app, before serving. With gunicorn --preload
+#               the master loads it once and forked workers share it
+#   off         never; every message is the template
+CHATBOT_MODEL_MODE = os.getenv("CHATBOT_MODEL_MODE", "lazy").lower()
+
+# Concurrent prompts are generated together: a batch closes when it holds
+# CHATBOT_BATCH_SIZE prompts or its first prompt has waited CHATBOT_BATCH_WAIT_MS
+CHATBOT_BATCH_SIZE = int(os.getenv("CHATBOT_BATCH_SIZE", "8"))
+CHATBOT_BATCH_WAIT_MS = float(os.getenv("CHATBOT_BATCH_WAIT_MS", "10"))
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+_load_state = {"status": "off" if CHATBOT_MODEL_MODE == "off" else "cold",
+               "load_seconds": None, "error": None}
+
+def get_chatbot_pipeline():
+    """The Hugging Face pipeline, loaded on first use"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                if CHATBOT_MODEL_MODE == "off":
+                    raise RuntimeError("The chatbot model is disabled (CHATBOT_MODEL_MODE=off).")
+                _load_state["status"] = "loading"
+                start = time.perf_counter()
+                try:
+                    # transformers alone takes seconds to import
+                    from transformers import pipeline
+                    _pipeline = pipeline("text2text-generation", model=CHATBOT_MODEL)
+                except Exception as e:
+                    _load_state.update(status="failed", error=str(e))
+                    raise
+                _load_state.update(status="ready", error=None,
+                                   load_seconds=round(time.perf_counter() - start, 3))
+    return _pipeline
+
+def warm_chatbot_async():
+    """Start loading the model in a daemon thread; returns immediately"""
+    if CHATBOT_MODEL_MODE == "off" or _pipeline is not None:
+        return None
+    thread = threading.Thread(target=_warm, name="chatbot-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def _warm():
+    try:
+        get_chatbot_pipeline()
+    except Exception:
+        pass  # Recorded in _load_state and reported by chatbot_status
+
+def start_chatbot():
+    """Load, or start loading, the model as CHATBOT_MODEL_MODE asks"""
+    if CHATBOT_MODEL_MODE == "eager":
+        get_chatbot_pipeline()
+    elif CHATBOT_MODEL_MODE == "background":
+        warm_chatbot_async()
+
+def chatbot_status():
+    return dict(_load_state, mode=CHATBOT_MODEL_MODE, model=CHATBOT_MODEL)
+
+def chatbot_ready():
+    return _pipeline is not None
+
+def use_template():
+    """
+    True when requests should get the template straight away: the model is
+    disabled, failed to load, or is still warming in the background
+    """
+    if CHATBOT_MODEL_MODE == "off" or _load_state["status"] == "failed":
+        return True
+    return CHATBOT_MODEL_MODE == "background" and _pipeline is None
+
+def _generate_batch(prompts):
+    responses = get_chatbot_pipeline()(prompts, max_length=100, num_return_sequences=1,
+                                       batch_size=len(prompts))
+    # Lists of inputs come back as one dict, or a one-element list, per prompt
+    return [(r[0] if isinstance(r, list) else r)["generated_text"] for r in responses]
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_chatbot_batcher():
+    """
+    The process-wide batcher. Created on first use so that its thread
+    belongs to the serving process, not a gunicorn master that forked it.
+    """
+    global _batcher
+    if _batcher is None:
+        # Not _pipeline_lock: that one is held for the whole model load
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(_generate_batch, CHATBOT_BATCH_SIZE, CHATBOT_BATCH_WAIT_MS,
+                                        name="chatbot-batcher")
+    return _batcher
+
+def get_batching_stats():
+    """The micro-batcher's statistics, or empty ones before the first chatbot request"""
+    batcher = _batcher
+    if batcher is None:
+        return {"batches": 0, "items": 0, "max_batch_size": CHATBOT_BATCH_SIZE,
+                "max_wait_ms": CHATBOT_BATCH_WAIT_MS, "pending": 0}
+    return batcher.stats()
+
+register_collector("catnip_chatbot_batching", lambda: _batcher.stats() if _batcher is not None else None,
+                   "Chatbot micro-batcher statistics.")
 
 def get_chatbot_response_hf(pickup, dropoff, route, distance_km, duration_min):
+    if CHATBOT_MODEL_MODE == "off":
+        return get_template_response(pickup, dropoff, distance_km, duration_min)
     prompt = (
         f"A user is traveling from {pickup} to {dropoff}. "
         f"The optimized route is {route}. "
         f"The distance is {distance_km:.2f} km and will take approximately {duration_min:.2f} minutes. "
         "Generate a friendly response."
     )
-    response = chatbot_pipeline(prompt, max_length=100, num_return_sequences=1)
-    return response[0]["generated_text"]
\ No newline at end of file
+    return get_chatbot_batcher()(prompt)
+
+def get_template_response(pickup, dropoff, distance_km, duration_min):
+    """Deterministic message used when the model is too slow, busy or disabled"""
+    return (
+        f"Your route from {pickup} to {dropoff} is ready: "
+        f"{distance_km:.2f} km, about {duration_min:.2f} minutes. Safe travels!"
+    )
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import counter
+
+# Workers mostly wait on the chatbot's micro-batcher, so there should be at
+# least as many as CHATBOT_BATCH_SIZE for batches to fill
+CHATBOT_WORKERS = int(os.getenv("CHATBOT_WORKERS", "8"))
+CHATBOT_QUEUE_SIZE = int(os.getenv("CHATBOT_QUEUE_SIZE", "32"))
+CHATBOT_TIMEOUT = float(os.getenv("CHATBOT_TIMEOUT", "20"))
+CHATBOT_JOB_TTL = float(os.getenv("CHATBOT_JOB_TTL", "600"))
+
+CHATBOT_OUTCOMES = counter("catnip_chatbot_outcomes_total",
+                           "How chatbot messages were produced: model, timeout, error, "
+                           "queue_full or disabled.", ("outcome",))
+
+class QueueFull(Exception):
+    pass
+
+class _Job:
+    def __init__(self, fallback, timeout):
+        self.id = uuid.uuid4().hex
+        self.fallback = fallback
+        self.status = "pending"
+        self.result = None
+        self.source = None
+        self.created = time.time()
+        self.deadline = time.monotonic() + timeout
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if not self.done.is_set():
+                self.status = "running"
+
+    def finish(self, result, source, outcome=None):
+        """First finisher wins: the model, or the timeout fallback"""
+        with self._lock:
+            if self.done.is_set():
+                return
+            self.result = result
+            self.source = source
+            self.status = "done"
+            self.done.set()
+        CHATBOT_OUTCOMES.inc(outcome or source)
+
+    def expire(self):
+        """Complete with the fallback if the deadline has passed"""
+        if not self.done.is_set() and time.monotonic() >= self.deadline:
+            self.finish(self.fallback, "template", "timeout")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "chatbot_response": self.result,
+            "source": self.source,
+        }
+
+class ChatbotJobQueue:
+    """
+    Bounded worker pool for chatbot generation.
+
+    At most ``max_pending`` jobs may be queued or running; beyond that
+    submit() raises QueueFull so callers can degrade instead of piling up
+    work. A job that has not finished within ``timeout`` seconds is
+    completed with its template fallback; the model's late answer is
+    dropped. The deadline is checked by whoever looks at the job (wait,
+    get and the purge), so no thread sleeps per job. Jobs are kept in
+    memory for ``ttl`` seconds, unless a synchronous caller takes the
+    result with wait(forget=True).
+    """
+
+    def __init__(self, max_workers=CHATBOT_WORKERS, max_pending=CHATBOT_QUEUE_SIZE,
+                 timeout=CHATBOT_TIMEOUT, ttl=CHATBOT_JOB_TTL):
+        self.timeout = timeout
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chatbot")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        # In creation order, so the purge only looks at the oldest jobs
+        self._jobs = OrderedDict()
+        # Jobs not done yet; at most max_pending, since each holds a slot
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _purge(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for job in list(self._pending):
+                job.expire()
+                if job.done.is_set():
+                    self._pending.discard(job)
+            while self._jobs:
+                job = next(iter(self._jobs.values()))
+                if job.created >= cutoff or not job.done.is_set():
+                    break
+                self._jobs.popitem(last=False)
+
+    def submit(self, fn, *args, fallback=None):
+        """Queue fn(*args); returns the job id"""
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull("Chatbot queue is full.")
+        self._purge()
+        job = _Job(fallback, self.timeout)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._pending.add(job)
+
+        def run():
+            job.start()
+            try:
+                result = fn(*args)
+                # An answer after the deadline loses, even if nobody has asked yet
+                job.expire()
+                job.finish(result, "model")
+            except Exception:
+                job.finish(job.fallback, "template", "error")
+            finally:
+                self._slots.release()
+
+        self._executor.submit(run)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        job.expire()
+        return job.to_dict()
+
+    def wait(self, job_id, timeout=None, forget=False):
+        """
+        Block until the job is done (or timeout); returns get(job_id).
+        With forget, a done job is dropped at once instead of being kept
+        for the TTL, for callers nobody will poll after.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        remaining = max(0.0, job.deadline - time.monotonic())
+        job.done.wait(remaining if timeout is None else min(timeout, remaining))
+        job.expire()
+        if forget and job.done.is_set():
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                self._pending.discard(job)
+        return job.to_dict()
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_chatbot_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = ChatbotJobQueue()
+    return _queue
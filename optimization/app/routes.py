@@ -1,57 +1,348 @@
-from flask import Flask, request, jsonify
-from models.database import db, RouteMetadata
-from utils.geocoding import get_geocoordinates
-from utils.routing import get_route_data
-from app.chatbot import get_chatbot_response_hf
+import base64
+import json
+import os
+import time
+from datetime import datetime
 
-app = Flask(__name__)
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from models.database import db, routes_history_page
+from models.route_writer import flush_route_writes, get_route_writer
+from utils.geoocoding import geocode_many, geocode_pair
+from utils.polyline import GEOMETRY_PREFIX, decode_geometry, encode_geometry, is_encoded
+from utils.routing import get_route_data, get_route_data_batch, get_route_cache_stats
+from utils.vrp import solve_vrp
+from app.chatbot import (chatbot_status, get_batching_stats, get_chatbot_response_hf,
+                         get_template_response, use_template)
+from app.jobs import CHATBOT_OUTCOMES, QueueFull, get_chatbot_queue
+from utils.metrics import (METRICS_ENABLED, histogram, render, request_timings,
+                           stage, start_request_timings)
 
-@app.route("/optimize-route", methods=["POST"])
+# Registered on the application by create_app
+bp = Blueprint("routes", __name__)
+
+# Adds a Server-Timing header with per-stage durations to every response
+METRICS_TIMING_HEADER = os.getenv("METRICS_TIMING_HEADER", "0") == "1"
+
+REQUEST_SECONDS = histogram("catnip_request_seconds", "Request latency by endpoint and status.",
+                            ("endpoint", "status"))
+
+if METRICS_ENABLED:
+    @bp.before_app_request
+    def _start_request_timer():
+        request.environ["catnip.start"] = time.perf_counter()
+        if METRICS_TIMING_HEADER:
+            start_request_timings()
+
+    @bp.after_app_request
+    def _record_request(response):
+        start = request.environ.get("catnip.start")
+        if start is not None:
+            elapsed = time.perf_counter() - start
+            REQUEST_SECONDS.observe(elapsed, request.endpoint or "unmatched", response.status_code)
+            if METRICS_TIMING_HEADER:
+                parts = [f"{name};dur={seconds * 1e3:.2f}" for name, seconds in request_timings()]
+                parts.append(f"total;dur={elapsed * 1e3:.2f}")
+                response.headers["Server-Timing"] = ", ".join(parts)
+        return response
+
+def _route_row(pickup, dropoff, route_data):
+    """
+    RouteMetadata column values for a routed pair. The routing engine
+    returns km and hours; the table stores km and minutes.
+    """
+    return dict(
+        pickup_location=pickup,
+        dropoff_location=dropoff,
+        optimized_route=encode_geometry(route_data["geometry"]),
+        distance=route_data["distance"],
+        duration=route_data["duration"] * 60,
+    )
+
+@bp.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(render(), mimetype="text/plain; version=0.0.4")
+
+@bp.route("/optimize-route", methods=["POST"])
 def optimize_route():
     data = request.json
     pickup = data.get("pickup")
     dropoff = data.get("dropoff")
+    async_chatbot = bool(data.get("async")) or request.args.get("async") == "1"
 
-    # Step 1: Geocoding
-    pickup_coords = get_geocoordinates(pickup)
-    dropoff_coords = get_geocoordinates(dropoff)
+    # Step 1: Geocoding (both lookups overlap)
+    with stage("geocode"):
+        pickup_coords, dropoff_coords = geocode_pair(pickup, dropoff)
 
     # Step 2: Route Optimization
-    route_data = get_route_data(pickup_coords, dropoff_coords)
+    with stage("route"):
+        route_data = get_route_data(pickup_coords, dropoff_coords)
     route = route_data["geometry"]
-    distance_km = route_data["distance"] / 1000
-    duration_min = route_data["duration"] / 60
+    row = _route_row(pickup, dropoff, route_data)
+    distance_km, duration_min = row["distance"], row["duration"]
 
-    # Step 3: Save Metadata
-    metadata = RouteMetadata(
-        pickup_location=pickup,
-        dropoff_location=dropoff,
-        optimized_route=str(route),
-        distance=distance_km,
-        duration=duration_min,
-    )
-    db.session.add(metadata)
-    db.session.commit()
+    # Step 3: Save Metadata (buffered and written in bulk)
+    with stage("db_write"):
+        get_route_writer().add(**row)
 
-    # Step 4: Chatbot Response
-    chatbot_response = get_chatbot_response_hf(
-        pickup, dropoff, route, distance_km, duration_min
-    )
+    # Step 4: Chatbot Response, generated on the bounded chatbot queue.
+    # A full queue or a slow model falls back to the template message.
+    fallback = get_template_response(pickup, dropoff, distance_km, duration_min)
+    if use_template():
+        CHATBOT_OUTCOMES.inc("disabled")
+        return jsonify({"route": route, "chatbot_response": fallback})
+    queue = get_chatbot_queue()
+    try:
+        job_id = queue.submit(get_chatbot_response_hf, pickup, dropoff, route,
+                              distance_km, duration_min, fallback=fallback)
+    except QueueFull:
+        CHATBOT_OUTCOMES.inc("queue_full")
+        return jsonify({"route": route, "chatbot_response": fallback})
+
+    if async_chatbot:
+        # Dispatchers get the route now and fetch the message later
+        return jsonify({
+            "route": route,
+            "chatbot_job": job_id,
+            "chatbot_url": f"/chatbot-jobs/{job_id}",
+            "chatbot_events_url": f"/chatbot-jobs/{job_id}/events",
+        }), 202
+
+    with stage("chatbot"):
+        job = queue.wait(job_id, forget=True)
+    return jsonify({"route": route, "chatbot_response": job["chatbot_response"]})
+
+@bp.route("/chatbot-jobs/<job_id>", methods=["GET"])
+def chatbot_job(job_id):
+    job = get_chatbot_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job."}), 404
+    return jsonify(job)
+
+@bp.route("/chatbot-jobs/<job_id>/events", methods=["GET"])
+def chatbot_job_events(job_id):
+    """Server-sent events: keep-alive comments until a single result event"""
+    queue = get_chatbot_queue()
+    if queue.get(job_id) is None:
+        return jsonify({"error": "Unknown or expired job."}), 404
+
+    def generate():
+        while True:
+            job = queue.wait(job_id, timeout=5)
+            if job is None or job["status"] == "done":
+                yield f"event: result\ndata: {json.dumps(job)}\n\n"
+                return
+            yield ": waiting\n\n"
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache"})
+
+@bp.route("/optimize-route/batch", methods=["POST"])
+def optimize_route_batch():
+    data = request.json or {}
+    pairs = data.get("pairs") if isinstance(data, dict) else None
+    if not isinstance(pairs, list) or not pairs:
+        return jsonify({"error": "'pairs' must be a non-empty list."}), 400
+
+    # Step 1: Geocoding (place names only, deduplicated and looked up in
+    # parallel; [lat, lon] pairs pass straight through)
+    names = [location for pair in pairs if isinstance(pair, dict)
+             for location in (pair.get("pickup"), pair.get("dropoff"))
+             if isinstance(location, str)]
+    geocoded = dict(zip(names, geocode_many(names, return_exceptions=True)))
 
-    return jsonify({"route": route, "chatbot_response": chatbot_response})
+    coords, errors = [], {}
+    for i, pair in enumerate(pairs):
+        try:
+            pickup, dropoff = pair.get("pickup"), pair.get("dropoff")
+            pair_coords = tuple(
+                geocoded[location] if isinstance(location, str) else location
+                for location in (pickup, dropoff)
+            )
+            for location in pair_coords:
+                if isinstance(location, Exception):
+                    raise location
+            coords.append(pair_coords)
+        except (AttributeError, ValueError, OSError) as e:
+            # OSError covers network failures raised by the geocoder
+            errors[i] = "Each pair needs 'pickup' and 'dropoff'." if isinstance(e, AttributeError) else str(e)
+            coords.append(None)
 
-@app.route("/routes-history", methods=["GET"])
+    # Step 2: Route Optimization, one vectorized snap and one search per source
+    routed = get_route_data_batch([c for c in coords if c is not None])
+    routed = iter(routed)
+
+    # Step 3: Save Metadata, queued together for one bulk insert
+    results, rows = [], []
+    for i, pair in enumerate(pairs):
+        if i in errors:
+            results.append({"index": i, "error": errors[i]})
+            continue
+        result = next(routed)
+        if "error" in result:
+            results.append({"index": i, "error": result["error"]})
+            continue
+
+        route_data = result["route"]
+        rows.append(_route_row(str(pair["pickup"]), str(pair["dropoff"]), route_data))
+        results.append({
+            "index": i,
+            "route": route_data["geometry"],
+            "path": route_data["path"],
+            "distance_km": route_data["distance"],
+            "duration_hours": route_data["duration"],
+        })
+    if rows:
+        get_route_writer().add_many(rows)
+
+    return jsonify({"results": results})
+
+@bp.route("/optimize-route/multi-stop", methods=["POST"])
+def optimize_route_multi_stop():
+    data = request.json or {}
+    if not isinstance(data, dict):
+        data = {}
+    depot = data.get("depot")
+    stops = data.get("stops")
+    if depot is None or not isinstance(stops, list) or not stops:
+        return jsonify({"error": "'depot' and a non-empty 'stops' list are required."}), 400
+
+    try:
+        # Place names are geocoded in parallel; [lat, lon] pairs are used as given
+        names = [location for location in [depot] + stops if isinstance(location, str)]
+        geocoded = dict(zip(names, geocode_many(names)))
+        depot_coords, *stop_coords = [
+            geocoded[location] if isinstance(location, str) else location
+            for location in [depot] + stops
+        ]
+        plan = solve_vrp(
+            depot_coords,
+            stop_coords,
+            num_vehicles=data.get("vehicles", 1),
+            max_stops_per_vehicle=data.get("max_stops_per_vehicle"),
+            time_budget=data.get("time_budget", 0.5),
+            objective=data.get("objective", "distance"),
+            return_to_depot=bool(data.get("return_to_depot", True)),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(plan)
+
+@bp.route("/route-cache/stats", methods=["GET"])
+def route_cache_stats():
+    stats = get_route_cache_stats()
+    if stats is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(stats, enabled=True))
+
+@bp.route("/ready", methods=["GET"])
+def ready():
+    """
+    503 while an eager or background model load is still running, so load
+    balancers hold traffic until the chatbot is warm. Lazy and disabled
+    modes are ready at once; a failed load serves templates and reports it.
+    """
+    status = chatbot_status()
+    warming = status["mode"] in ("eager", "background") and status["status"] in ("cold", "loading")
+    return jsonify({"ready": not warming, "chatbot": status}), 503 if warming else 200
+
+@bp.route("/chatbot/batching-stats", methods=["GET"])
+def chatbot_batching_stats():
+    return jsonify(get_batching_stats())
+
+HISTORY_DEFAULT_LIMIT = 100
+HISTORY_MAX_LIMIT = 1000
+HISTORY_STREAM_BATCH = 1000
+
+HISTORY_GEOMETRY_FORMATS = (None, "points", "polyline")
+
+def _route_history_row(route, geometry=None):
+    row = {
+        "id": route.id,
+        "pickup_location": route.pickup_location,
+        "dropoff_location": route.dropoff_location,
+        "distance": route.distance,
+        "duration": route.duration,
+        "timestamp": route.timestamp,
+    }
+    try:
+        if geometry == "points":
+            row["route"] = decode_geometry(route.optimized_route)
+        elif geometry == "polyline":
+            # Stored polylines pass through without decoding
+            text = route.optimized_route
+            if not is_encoded(text):
+                text = encode_geometry(decode_geometry(text))
+            row["route"] = text[len(GEOMETRY_PREFIX):]
+    except ValueError:
+        row["route"] = None
+    return row
+
+def _encode_cursor(route):
+    raw = json.dumps([route.timestamp.isoformat(), route.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor):
+    timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(timestamp), int(row_id)
+
+def _parse_history_args(args):
+    filters = {
+        "pickup": args.get("pickup"),
+        "dropoff": args.get("dropoff"),
+        "since": datetime.fromisoformat(args["since"]) if args.get("since") else None,
+        "until": datetime.fromisoformat(args["until"]) if args.get("until") else None,
+    }
+    after = _decode_cursor(args["cursor"]) if args.get("cursor") else None
+    return filters, after
+
+@bp.route("/routes-history", methods=["GET"])
 def routes_history():
-    routes = RouteMetadata.query.all()
-    response = [
-        {
-            "id": route.id,
-            "pickup_location": route.pickup_location,
-            "dropoff_location": route.dropoff_location,
-            "distance": route.distance,
-            "duration": route.duration,
-            "timestamp": route.timestamp,
-        }
-        for route in routes
-    ]
-    return jsonify(response)
\ No newline at end of file
+    """
+    Route history, newest first, paged by an opaque (timestamp, id) cursor.
+
+    Query parameters: limit, cursor, pickup, dropoff, since, until (ISO
+    8601). With format=ndjson every matching row is streamed instead, one
+    JSON object per line. geometry=points adds each route as [lat, lon]
+    pairs, geometry=polyline as an encoded polyline (precision 5).
+    """
+    try:
+        filters, after = _parse_history_args(request.args)
+        limit = min(int(request.args.get("limit", HISTORY_DEFAULT_LIMIT)), HISTORY_MAX_LIMIT)
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid limit, cursor or date filter."}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive."}), 400
+    geometry = request.args.get("geometry")
+    if geometry not in HISTORY_GEOMETRY_FORMATS:
+        return jsonify({"error": "geometry must be 'points' or 'polyline'."}), 400
+
+    # Read-your-writes: routes still in the write-behind buffer are included
+    try:
+        flush_route_writes()
+    except Exception:
+        pass  # The rows stay buffered for the writer's retry; serve what is stored
+
+    if request.args.get("format") == "ndjson":
+        def generate(after):
+            # Keyset batches keep memory flat however large the table is
+            while True:
+                routes = routes_history_page(HISTORY_STREAM_BATCH, after, **filters)
+                for route in routes:
+                    row = _route_history_row(route, geometry)
+                    row["timestamp"] = route.timestamp.isoformat() if route.timestamp else None
+                    yield json.dumps(row) + "\n"
+                if len(routes) < HISTORY_STREAM_BATCH:
+                    break
+                after = (routes[-1].timestamp, routes[-1].id)
+                db.session.expunge_all()
+
+        return Response(stream_with_context(generate(after)), mimetype="application/x-ndjson")
+
+    # Fetch one extra row to know whether another page exists
+    routes = routes_history_page(limit + 1, after, **filters)
+    next_cursor = _encode_cursor(routes[limit - 1]) if len(routes) > limit else None
+    return jsonify({
+        "routes": [_route_history_row(route, geometry) for route in routes[:limit]],
+        "next_cursor": next_cursor,
+    })
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Run the routing microbenchmarks and the /optimize-route load test and
+write both to one JSON report, so runs can be compared over time.
+
+Run from the optimization directory:
+
+    python -m benchmarks [--output benchmarks/results/latest.json] [--quick]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_routing import print_result, run as run_routing
+from benchmarks.common import write_report
+
+def run_load(args):
+    # Separate interpreter: the load test configures the app at import time
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "load.json")
+        subprocess.run([sys.executable, "-m", "benchmarks.load_optimize_route", "--output", path] + args,
+                       check=True)
+        with open(path) as f:
+            return json.load(f)["results"]["optimize_route_load"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmarks/results/latest.json")
+    parser.add_argument("--quick", action="store_true", help="smaller graphs and fewer requests")
+    args = parser.parse_args()
+
+    sides, queries = ([30, 60], 50) if args.quick else ([30, 60, 120, 240], 200)
+    routing = run_routing(sides, queries)
+    for result in routing:
+        print_result(result)
+    load = run_load(["--requests", "200" if args.quick else "1000"])
+
+    write_report(args.output, {"routing": routing, "optimize_route_load": load})
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
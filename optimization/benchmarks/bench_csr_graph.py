@@ -0,0 +1,109 @@
+"""
+Compare the networkx routing path with the CSR graph engine.
+
+Run from the optimization directory:
+
+    python -m benchmarks.bench_csr_graph [--side 710] [--queries 20] [--skip-networkx-large]
+"""
+import argparse
+import random
+import time
+
+import networkx as nx
+import numpy as np
+
+from utils.csr_graph import CSRGraph
+from utils.distance import haversine
+from utils.routing import create_india_graph, haversine_distance
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+def synthetic_grid(side, seed=0):
+    """
+    Jittered side x side lattice over India's bounding box. Each node links
+    right and down, so the CSR store holds about 4 * side**2 directed edges.
+    """
+    rng = np.random.default_rng(seed)
+    lat = np.linspace(8.0, 35.0, side)
+    lon = np.linspace(68.0, 97.0, side)
+    grid_lat, grid_lon = np.meshgrid(lat, lon, indexing="ij")
+    coords = np.column_stack([grid_lat.ravel(), grid_lon.ravel()])
+    coords += rng.normal(scale=0.005, size=coords.shape)
+
+    ids = np.arange(side * side).reshape(side, side)
+    sources = np.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()])
+    targets = np.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()])
+
+    # Roads are never straight; a detour factor keeps the heuristic admissible
+    weights = haversine(coords[sources, 0], coords[sources, 1], coords[targets, 0], coords[targets, 1])
+    weights *= rng.uniform(1.0, 1.5, size=len(sources))
+    return sources, targets, weights, coords
+
+def networkx_from_arrays(sources, targets, weights, coords):
+    G = nx.Graph()
+    for i, pos in enumerate(coords.tolist()):
+        G.add_node(i, pos=tuple(pos))
+    for u, v, w in zip(sources.tolist(), targets.tolist(), weights.tolist()):
+        G.add_edge(u, v, weight=w, duration=w / 16.67)
+    return G
+
+def networkx_query(G, source, target):
+    def heuristic(n1, n2):
+        return haversine_distance(G.nodes[n1]['pos'], G.nodes[n2]['pos'])
+    return nx.astar_path(G, source, target, heuristic=heuristic, weight='weight')
+
+def bench_india(repeat=2000):
+    G = create_india_graph()
+    csr = CSRGraph.from_networkx(G)
+    pairs = [(a, b) for a in G for b in G]
+
+    nx_time, _ = timed(lambda: [networkx_query(G, a, b) for a, b in pairs])
+    csr_time, _ = timed(lambda: [csr.shortest_path(a, b) for a, b in pairs])
+    mismatches = sum(
+        networkx_query(G, a, b) != [csr.names[n] for n in csr.shortest_path(a, b)[0]]
+        for a, b in pairs
+    )
+    build_nx, _ = timed(create_india_graph, repeat=200)
+    build_csr, _ = timed(lambda: CSRGraph.from_networkx(G), repeat=200)
+
+    print("India graph (20 nodes, all 400 pairs)")
+    print(f"  build        networkx {build_nx * 1e6:9.1f} us   csr from networkx {build_csr * 1e6:9.1f} us")
+    print(f"  query        networkx {nx_time / len(pairs) * 1e6:9.1f} us   csr {csr_time / len(pairs) * 1e6:9.1f} us")
+    print(f"  path mismatches: {mismatches}")
+
+def bench_synthetic(side, queries, skip_networkx):
+    sources, targets, weights, coords = synthetic_grid(side)
+    build_csr, csr = timed(lambda: CSRGraph.from_edges(sources, targets, weights, coords=coords))
+    print(f"Synthetic lattice ({csr.num_nodes} nodes, {csr.num_edges} directed edges)")
+    print(f"  csr build    {build_csr:.2f} s, arrays "
+          f"{sum(a.nbytes for a in (csr.offsets, csr.targets, csr.weights, csr.durations)) / 1e6:.1f} MB")
+
+    rng = random.Random(1)
+    pairs = [(rng.randrange(csr.num_nodes), rng.randrange(csr.num_nodes)) for _ in range(queries)]
+    csr_time, _ = timed(lambda: [csr.shortest_path(a, b) for a, b in pairs])
+    print(f"  csr A*       {csr_time / queries * 1e3:9.1f} ms/query")
+
+    if skip_networkx:
+        return
+    build_nx, G = timed(lambda: networkx_from_arrays(sources, targets, weights, coords))
+    nx_time, _ = timed(lambda: [networkx_query(G, a, b) for a, b in pairs])
+    print(f"  networkx build {build_nx:.2f} s")
+    print(f"  networkx A*  {nx_time / queries * 1e3:9.1f} ms/query")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--side", type=int, default=710,
+                        help="lattice side; 710 gives about 1M undirected edges")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--skip-networkx-large", action="store_true")
+    args = parser.parse_args()
+
+    bench_india()
+    bench_synthetic(args.side, args.queries, args.skip_networkx_large)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Check utils.distance against the scalar haversine and time it.
+
+Run from the optimization directory:
+
+    python -m benchmarks.bench_distance [--points 2000]
+
+Exits non-zero if the vectorized results drift from the scalar ones by
+more than the stated tolerances.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from utils.distance import distance_matrix, haversine_scalar, nearest_indices, one_to_many
+from utils.helper import haversine as helper_haversine
+from utils.routing import haversine_distance
+
+# float64 should agree to floating point noise; float32 storage rounds to
+# about 1 m at the antipodes (20,000 km)
+TOLERANCE_M = {np.float64: 1e-6, np.float32: 2.0}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    points = np.column_stack([rng.uniform(-89, 89, args.points), rng.uniform(-180, 180, args.points)])
+    sample = points[:200]
+
+    start = time.perf_counter()
+    expected = np.array([[haversine_distance(p, q) for q in sample] for p in sample])
+    scalar_time = time.perf_counter() - start
+    assert np.allclose(expected / 1000,
+                       [[helper_haversine(*p, *q) for q in sample] for p in sample], rtol=0, atol=1e-9)
+
+    failed = False
+    for dtype, tolerance in TOLERANCE_M.items():
+        start = time.perf_counter()
+        got = distance_matrix(sample, dtype=dtype, chunk_size=64)
+        vector_time = time.perf_counter() - start
+        error = float(np.max(np.abs(got.astype(np.float64) - expected)))
+        ok = error <= tolerance
+        failed |= not ok
+        print(f"{dtype.__name__:8s} 200x200 max error {error:.3g} m (tolerance {tolerance:g}) "
+              f"{'ok' if ok else 'FAIL'}; {scalar_time / vector_time:.0f}x faster than scalar loop")
+
+    assert np.allclose(one_to_many(points[0], points), distance_matrix(points[:1], points)[0])
+    assert haversine_scalar(*points[0], *points[1]) == haversine_distance(points[0], points[1])
+
+    start = time.perf_counter()
+    matrix = distance_matrix(points, dtype=np.float32)
+    print(f"full {args.points}x{args.points} float32 matrix: {time.perf_counter() - start:.3f} s, "
+          f"{matrix.nbytes / 1e6:.1f} MB")
+    start = time.perf_counter()
+    nearest = nearest_indices(points, points[::10], chunk_size=512)
+    print(f"chunked nearest of {args.points} among {len(points[::10])}: {time.perf_counter() - start:.3f} s")
+    assert (nearest == np.argmin(distance_matrix(points, points[::10]), axis=1)).all()
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Measure geocoding latency against a local stand-in for Nominatim that
+answers every query after an artificial delay.
+
+Run from the optimization directory:
+
+    python -m benchmarks.bench_geocoding [--delay 0.2] [--addresses 40] [--workers 8]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.geoocoding import (GeocodeCache, Geocoder, NominatimClient, geocode_many,
+                              geocode_pair, get_geocoordinates, set_geocoder)
+
+def start_stub_server(delay):
+    """Nominatim-shaped server on a free local port; returns (server, url)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+            time.sleep(delay)
+            # Deterministic fake coordinates derived from the query text
+            seed = sum(map(ord, query))
+            body = json.dumps([{"lat": str(8 + seed % 27), "lon": str(68 + seed % 29)}])
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def fresh_geocoder(url):
+    # A new cache each time so every measurement goes to the stub server
+    geocoder = Geocoder(client=NominatimClient(url, min_interval=0), cache=GeocodeCache(), gazetteer={})
+    set_geocoder(geocoder)
+    return geocoder
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay", type=float, default=0.2)
+    parser.add_argument("--addresses", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.delay)
+    try:
+        print(f"Stub geocoder at {url}, {args.delay * 1e3:.0f} ms per lookup")
+
+        fresh_geocoder(url)
+        serial = timed(lambda: (get_geocoordinates("Warehouse 1, Pune"),
+                                get_geocoordinates("Warehouse 2, Pune")))
+        fresh_geocoder(url)
+        paired = timed(lambda: geocode_pair("Warehouse 1, Pune", "Warehouse 2, Pune"))
+        print(f"pickup + dropoff: serial {serial * 1e3:.0f} ms, concurrent {paired * 1e3:.0f} ms")
+
+        timed(lambda: geocode_pair("Warehouse 1, Pune", "Warehouse 2, Pune"))
+        cached = timed(lambda: geocode_pair("Warehouse 1, Pune", "Warehouse 2, Pune"))
+        print(f"pickup + dropoff, cached: {cached * 1e3:.2f} ms")
+
+        # Half the list repeats, as real dispatch batches do
+        addresses = [f"Depot {i % (args.addresses // 2)}, Nagpur" for i in range(args.addresses)]
+        fresh_geocoder(url)
+        serial = timed(lambda: [get_geocoordinates(a) for a in addresses])
+        fresh_geocoder(url)
+        bulk = timed(lambda: geocode_many(addresses, max_workers=args.workers))
+        print(f"{args.addresses} addresses: serial {serial * 1e3:.0f} ms, "
+              f"bulk ({args.workers} workers, deduplicated) {bulk * 1e3:.0f} ms")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compare storing route geometry as str(list_of_tuples) (the old format)
+with encoded polylines: bytes per route, encode and decode time, and the
+time to read and decode every route back out of SQLite.
+
+Routes are random walks with road-like spacing (around 100 m between
+points), the shape long routes on a detailed graph have.
+
+Run from the optimization directory:
+
+    python -m benchmarks.bench_geometry [--points 2000] [--routes 200]
+"""
+import argparse
+import ast
+import random
+import sqlite3
+import time
+
+from utils.polyline import decode_geometry, encode_geometry
+
+def random_route(points, rng):
+    lat, lon = rng.uniform(10, 30), rng.uniform(70, 88)
+    route = []
+    for _ in range(points):
+        lat += rng.gauss(0, 0.001)
+        lon += rng.gauss(0, 0.001)
+        # Six decimals, like coordinates from a real road network
+        route.append((round(lat, 6), round(lon, 6)))
+    return route
+
+def timed(fn, items):
+    start = time.perf_counter()
+    out = [fn(item) for item in items]
+    return out, time.perf_counter() - start
+
+def sqlite_read(values, decode):
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE routes (id INTEGER PRIMARY KEY, optimized_route TEXT)")
+    db.executemany("INSERT INTO routes (optimized_route) VALUES (?)", [(v,) for v in values])
+    db.commit()
+    start = time.perf_counter()
+    decoded = [decode(text) for (text,) in db.execute("SELECT optimized_route FROM routes")]
+    return decoded, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--routes", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    routes = [random_route(args.points, rng) for _ in range(args.routes)]
+    print(f"{args.routes} routes of {args.points} points")
+
+    legacy, legacy_encode = timed(str, routes)
+    encoded, polyline_encode = timed(encode_geometry, routes)
+    _, legacy_decode = timed(ast.literal_eval, legacy)
+    decoded, polyline_decode = timed(decode_geometry, encoded)
+    _, legacy_read = sqlite_read(legacy, ast.literal_eval)
+    _, polyline_read = sqlite_read(encoded, decode_geometry)
+
+    error = max(max(abs(a - c), abs(b - d))
+                for route, back in zip(routes, decoded) for (a, b), (c, d) in zip(route, back))
+    legacy_bytes = sum(map(len, legacy)) / args.routes
+    polyline_bytes = sum(map(len, encoded)) / args.routes
+    print(f"{'':>10} {'bytes/route':>12} {'encode ms':>10} {'decode ms':>10} {'read+decode ms':>15}")
+    print(f"{'str()':>10} {legacy_bytes:12.0f} {legacy_encode * 1e3:10.1f} "
+          f"{legacy_decode * 1e3:10.1f} {legacy_read * 1e3:15.1f}")
+    print(f"{'polyline':>10} {polyline_bytes:12.0f} {polyline_encode * 1e3:10.1f} "
+          f"{polyline_decode * 1e3:10.1f} {polyline_read * 1e3:15.1f}")
+    print(f"size {legacy_bytes / polyline_bytes:.1f}x smaller, max coordinate error {error:.1e} deg")
+
+if __name__ == "__main__":
+    main()
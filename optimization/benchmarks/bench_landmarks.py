@@ -0,0 +1,62 @@
+"""
+Measure ALT preprocessing cost and query latency on the CSR graph engine.
+
+Run from the optimization directory:
+
+    python -m benchmarks.bench_landmarks [--side 300] [--landmarks 8] [--queries 50]
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.bench_csr_graph import synthetic_grid
+from utils.csr_graph import CSRGraph
+from utils.landmarks import LandmarkIndex
+
+def query_stats(graph, pairs, heuristic):
+    settled = 0
+    start = time.perf_counter()
+    for source, target in pairs:
+        if heuristic == "dijkstra":
+            dist, _ = graph.search(source, target)
+        else:
+            h = graph.landmarks.heuristic(target) if heuristic == "alt" else graph._heuristic(target)
+            dist, _ = graph.search(source, target, h)
+        settled += len(dist)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(pairs) * 1e3, settled / len(pairs)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--side", type=int, default=300)
+    parser.add_argument("--landmarks", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    sources, targets, weights, coords = synthetic_grid(args.side)
+    graph = CSRGraph.from_edges(sources, targets, weights, coords=coords)
+    print(f"Graph: {graph.num_nodes} nodes, {graph.num_edges} directed edges")
+
+    index = LandmarkIndex.build(graph, args.landmarks)
+    print(f"Cold preprocessing ({args.landmarks} landmarks): {index.build_seconds:.2f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        index.save(directory)
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        index = LandmarkIndex.load(directory, mmap=True)
+        graph.use_landmarks(index)
+        load_time = time.perf_counter() - start
+        print(f"Persist: save {save_time * 1e3:.1f} ms, mmap load {load_time * 1e3:.1f} ms")
+
+        rng = random.Random(1)
+        pairs = [(rng.randrange(graph.num_nodes), rng.randrange(graph.num_nodes))
+                 for _ in range(args.queries)]
+        for heuristic in ("dijkstra", "haversine", "alt"):
+            ms, labelled = query_stats(graph, pairs, heuristic)
+            print(f"  {heuristic:10s} {ms:9.2f} ms/query  {labelled:10.0f} nodes labelled/query")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare RouteMetadata insert throughput: one commit per request (the old
+/optimize-route behaviour) against the write-behind buffer, with and
+without the WAL pragmas, on a temporary SQLite file.
+
+Run from the optimization directory:
+
+    python -m benchmarks.bench_route_writes [--rows 2000] [--threads 8]
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, func, select
+
+from models.database import RouteMetadata, configure_sqlite
+from models.route_writer import RouteWriteBuffer
+
+ROUTE = str([(28.7041, 77.1025), (26.9124, 75.7873), (19.076, 72.8777)])
+
+def make_row(i):
+    return dict(pickup_location=f"Pickup {i}", dropoff_location=f"Dropoff {i}",
+                optimized_route=ROUTE, distance=1400.0, duration=1260.0)
+
+def make_engine(path, wal):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    if wal:
+        configure_sqlite(engine)
+    RouteMetadata.__table__.create(engine)
+    return engine
+
+def per_request(engine, rows, threads):
+    table = RouteMetadata.__table__
+
+    def insert(row):
+        with engine.begin() as conn:
+            conn.execute(table.insert(), [row])
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(insert, rows))
+
+def write_behind(engine, rows, threads):
+    writer = RouteWriteBuffer(engine)
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda row: writer.add(**row), rows))
+    writer.close()
+    return writer.stats()
+
+def run(name, fn, rows, threads, wal):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "routes.db"), wal)
+        start = time.perf_counter()
+        stats = fn(engine, rows, threads)
+        elapsed = time.perf_counter() - start
+        with engine.connect() as conn:
+            written = conn.execute(select(func.count()).select_from(RouteMetadata.__table__)).scalar()
+        engine.dispose()
+    assert written == len(rows), (written, len(rows))
+    extra = f", {stats['flushes']} flushes" if stats else ""
+    print(f"{name:>28}: {len(rows) / elapsed:10.0f} rows/s ({elapsed * 1e3:.0f} ms{extra})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    rows = [make_row(i) for i in range(args.rows)]
+    print(f"{args.rows} rows from {args.threads} threads")
+    run("per-request commit", per_request, rows, args.threads, wal=False)
+    run("per-request commit, WAL", per_request, rows, args.threads, wal=True)
+    run("write-behind, WAL", write_behind, rows, args.threads, wal=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Microbenchmarks for the routing layer on the India graph and on synthetic
+lattices of increasing size: graph and index build, coordinate snapping,
+and path search through each engine configuration.
+
+Run from the optimization directory:
+
+    python -m benchmarks.bench_routing [--sides 30 60 120] [--queries 200] [--output routing.json]
+"""
+import argparse
+import random
+
+import numpy as np
+
+from benchmarks.bench_csr_graph import networkx_from_arrays, synthetic_grid
+from benchmarks.common import print_latency, summarize, time_each, timed, write_report
+from utils.routing import RoutingEngine, create_india_graph
+
+# networkx A* gets slow on big lattices; beyond this many nodes only the
+# CSR engine is timed
+NETWORKX_MAX_NODES = 20000
+
+def random_points(graph, count, rng):
+    """Query points scattered around the graph's bounding box"""
+    coords = np.array([pos for _, pos in graph.nodes(data="pos")])
+    low, high = coords.min(axis=0), coords.max(axis=0)
+    return [(rng.uniform(low[0], high[0]), rng.uniform(low[1], high[1])) for _ in range(count)]
+
+def bench_graph(name, build_graph, queries, seed=0, landmarks=8):
+    rng = random.Random(seed)
+    result = {"graph": name}
+
+    graph_seconds, graph = timed(build_graph)
+    result["nodes"] = graph.number_of_nodes()
+    result["edges"] = graph.number_of_edges()
+    engine = RoutingEngine(graph, precompute=False)
+    index_seconds, _ = timed(engine.spatial_index)
+    csr_seconds, csr = timed(engine.csr_graph)
+    alt_engine = RoutingEngine(graph, precompute=False, landmarks=landmarks)
+    alt_seconds, _ = timed(alt_engine.csr_graph)
+    result["build_seconds"] = {
+        "graph": round(graph_seconds, 4),
+        "spatial_index": round(index_seconds, 4),
+        "csr": round(csr_seconds, 4),
+        f"csr_alt_{landmarks}": round(alt_seconds, 4),
+    }
+
+    points = random_points(graph, queries, rng)
+    vector_seconds, _ = timed(lambda: engine.spatial_index().nearest_names(points))
+    result["snap"] = {
+        "single": summarize(time_each(engine.nearest_node, points)),
+        "vectorized_points_per_second": round(len(points) / vector_seconds),
+    }
+
+    nodes = list(graph.nodes)
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(queries)]
+    search = {
+        "csr_astar": summarize(time_each(lambda p: csr.route_nodes(*p), pairs)),
+        "csr_alt": summarize(time_each(lambda p: alt_engine.route_nodes(*p), pairs)),
+    }
+    if graph.number_of_nodes() <= NETWORKX_MAX_NODES:
+        search["networkx_astar"] = summarize(time_each(lambda p: engine.route_nodes(*p), pairs))
+    if name == "india":
+        table = RoutingEngine(graph, precompute=True)
+        table.warm()
+        search["precomputed_table"] = summarize(time_each(lambda p: table.route_nodes(*p), pairs))
+    result["search"] = search
+    return result
+
+def print_result(result):
+    print(f"{result['graph']}: {result['nodes']} nodes, {result['edges']} edges")
+    builds = ", ".join(f"{k} {v * 1e3:.1f} ms" for k, v in result["build_seconds"].items())
+    print(f"  build: {builds}")
+    print_latency("snap (one point)", result["snap"]["single"])
+    print(f"  {'snap (vectorized)':<36} {result['snap']['vectorized_points_per_second']} points/s")
+    for name, summary in result["search"].items():
+        print_latency(f"search ({name})", summary)
+
+def run(sides, queries, seed=0):
+    results = [bench_graph("india", create_india_graph, queries, seed)]
+    for side in sides:
+        results.append(bench_graph(f"lattice_{side}x{side}",
+                                   lambda: networkx_from_arrays(*synthetic_grid(side, seed)),
+                                   queries, seed))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sides", type=int, nargs="*", default=[30, 60, 120])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.sides, args.queries, args.seed)
+    for result in results:
+        print_result(result)
+    if args.output:
+        write_report(args.output, {"routing": results})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Measure how long run.py takes to start (imports plus create_app) in a
+fresh interpreter for each chatbot model mode.
+
+Run from the optimization directory:
+
+    python -m benchmarks.bench_startup [--modes off lazy eager] [--repeat 3]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = "import run; print(run.STARTUP_SECONDS)"
+
+def startup_seconds(mode):
+    env = dict(os.environ, CHATBOT_MODEL_MODE=mode)
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["off", "lazy", "background", "eager"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        times = [startup_seconds(mode) for _ in range(args.repeat)]
+        print(f"{mode:>10}: median {statistics.median(times):.3f}s, "
+              f"min {min(times):.3f}s over {args.repeat} starts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Time the multi-stop solver on random instances.
+
+Run from the optimization directory:
+
+    python -m benchmarks.bench_vrp [--stops 200] [--vehicles 1 3 5] [--budget 0.5] [--grid-side 30]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_csr_graph import networkx_from_arrays, synthetic_grid
+from utils.distance import distance_matrix
+from utils.routing import RoutingEngine
+from utils.vrp import nearest_insertion, optimize_routes, solve_vrp, _route_cost
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stops", type=int, default=200)
+    parser.add_argument("--vehicles", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--budget", type=float, default=0.5)
+    parser.add_argument("--grid-side", type=int, default=30,
+                        help="side of the lattice for the road-graph run; stops sit on distinct nodes")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    points = np.column_stack([rng.uniform(8, 35, args.stops + 1), rng.uniform(68, 97, args.stops + 1)])
+    cost = distance_matrix(points)
+
+    print(f"{args.stops} stops, straight-line matrix, {args.budget}s budget")
+    for vehicles in args.vehicles:
+        capacity = -(-args.stops // vehicles)
+        start = time.perf_counter()
+        initial = nearest_insertion(cost, vehicles, capacity)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        routes = optimize_routes(cost, vehicles, capacity, args.budget)
+        solve = time.perf_counter() - start
+        before = sum(_route_cost(cost, r) for r in initial) / 1000
+        after = sum(_route_cost(cost, r) for r in routes) / 1000
+        print(f"  {vehicles} vehicle(s): insertion {build * 1e3:6.1f} ms {before:9.0f} km -> "
+              f"local search {solve * 1e3:6.1f} ms total {after:9.0f} km")
+
+    start = time.perf_counter()
+    plan = solve_vrp(tuple(points[0]), [tuple(p) for p in points[1:]], num_vehicles=3,
+                     time_budget=args.budget)
+    print(f"End to end on the India graph (3 vehicles): {(time.perf_counter() - start) * 1e3:.1f} ms, "
+          f"{plan['distance']:.0f} km")
+
+    # Road-graph matrix: one stop per distinct node, so nothing is deduplicated
+    graph = networkx_from_arrays(*synthetic_grid(args.grid_side, 0))
+    engine = RoutingEngine(graph, precompute=False)
+    names = list(graph.nodes)
+    picked = rng.choice(len(names), min(args.stops + 1, len(names)), replace=False)
+    coords = [graph.nodes[names[i]]['pos'] for i in picked]
+    start = time.perf_counter()
+    engine.cost_matrix([names[i] for i in picked])
+    matrix = time.perf_counter() - start
+    start = time.perf_counter()
+    plan = solve_vrp(coords[0], coords[1:], num_vehicles=3, time_budget=args.budget, engine=engine)
+    print(f"End to end on a {graph.number_of_nodes()}-node lattice, {len(coords) - 1} distinct stop nodes "
+          f"(3 vehicles): {(time.perf_counter() - start) * 1e3:.1f} ms, matrix {matrix * 1e3:.1f} ms")
+
+if __name__ == "__main__":
+    main()
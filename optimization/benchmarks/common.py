@@ -0,0 +1,76 @@
+"""
+Helpers shared by the benchmarks: latency percentiles and JSON reports
+that can be compared across runs.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    if not len(samples):
+        return {"count": 0}
+    ms = np.asarray(samples, dtype=np.float64) * 1e3
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+def time_each(fn, items):
+    """Call fn(item) for each item; returns the per-call durations in seconds"""
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def timed(fn):
+    """(seconds, result) of one call"""
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def write_report(path, results):
+    """Write {"environment": ..., "results": results} as JSON to path"""
+    report = {"environment": environment(), "results": results}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+def print_latency(label, summary, width=36):
+    if not summary.get("count"):
+        print(f"  {label:<{width}} no samples")
+        return
+    print(f"  {label:<{width}} p50 {summary['p50_ms']:9.3f} ms  p95 {summary['p95_ms']:9.3f} ms  "
+          f"p99 {summary['p99_ms']:9.3f} ms  (n={summary['count']})")
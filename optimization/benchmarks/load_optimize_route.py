@@ -0,0 +1,135 @@
+"""
+Load-test POST /optimize-route end to end over HTTP, with every external
+backend replaced by a local stand-in:
+
+- geocoding goes to the stub Nominatim server from bench_geocoding, with
+  an artificial delay, for the share of requests naming unknown places
+  (the rest hit the gazetteer);
+- the chatbot pipeline is a function that sleeps per batch instead of
+  running the model, so the job queue and micro-batcher are exercised;
+- the database is a temporary SQLite file.
+
+Reports p50/p95/p99 latency and throughput.
+
+Run from the optimization directory:
+
+    python -m benchmarks.load_optimize_route [--requests 500] [--concurrency 16] [--output load.json]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Lazy mode loads the model on first use, and start_app installs the stub
+# before that can happen
+os.environ["CHATBOT_MODEL_MODE"] = "lazy"
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import app.chatbot as chatbot
+from app import create_app
+from benchmarks.bench_geocoding import fresh_geocoder, start_stub_server
+from benchmarks.common import print_latency, summarize, write_report
+from models.route_writer import get_route_writer
+from utils.routing import INDIA_CITIES
+
+def stub_pipeline(delay):
+    """Stands in for the Hugging Face pipeline: one sleep per batch"""
+    def generate(prompts, **kwargs):
+        time.sleep(delay)
+        return [{"generated_text": f"Stub reply to: {prompt[:40]}"} for prompt in prompts]
+    return generate
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args):
+        pass
+
+def start_app(db_path, chatbot_delay):
+    chatbot._pipeline = stub_pipeline(chatbot_delay)
+    app = create_app(f"sqlite:///{db_path}")
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def make_payloads(count, unknown_share, rng):
+    cities = list(INDIA_CITIES)
+    payloads = []
+    for i in range(count):
+        pickup, dropoff = rng.sample(cities, 2)
+        if rng.random() < unknown_share:
+            # Not in the gazetteer: goes to the (stub) geocoding service
+            pickup = f"Warehouse {i}, {pickup}"
+        payloads.append({"pickup": pickup, "dropoff": dropoff})
+    return payloads
+
+def run_load(url, payloads, concurrency):
+    local = threading.local()
+
+    def send(payload):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        response = session.post(f"{url}/optimize-route", json=payload, timeout=60)
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        outcomes = list(pool.map(send, payloads))
+    wall = time.perf_counter() - start
+
+    latencies = [seconds for seconds, status in outcomes if status == 200]
+    return {
+        "requests": len(payloads),
+        "concurrency": concurrency,
+        "errors": sum(status != 200 for _, status in outcomes),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(payloads) / wall, 2),
+        "latency": summarize(latencies),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--geocode-delay", type=float, default=0.05,
+                        help="seconds the stub geocoder takes per lookup")
+    parser.add_argument("--chatbot-delay", type=float, default=0.05,
+                        help="seconds the stub chatbot takes per batch")
+    parser.add_argument("--unknown-share", type=float, default=0.3,
+                        help="share of requests with a pickup the gazetteer does not know")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    geocoder_server, geocoder_url = start_stub_server(args.geocode_delay)
+    fresh_geocoder(geocoder_url)
+    with tempfile.TemporaryDirectory() as tmp:
+        server, url = start_app(os.path.join(tmp, "bench.db"), args.chatbot_delay)
+        try:
+            payloads = make_payloads(args.requests, args.unknown_share, random.Random(args.seed))
+            # One warm-up request builds the routing engine and the queues
+            requests.post(f"{url}/optimize-route", json=payloads[0], timeout=60)
+            result = run_load(url, payloads, args.concurrency)
+            result["chatbot_batching"] = chatbot.get_chatbot_batcher().stats()
+        finally:
+            server.shutdown()
+            geocoder_server.shutdown()
+            # Write the buffered rows while the database still exists
+            with server.app.app_context():
+                get_route_writer().close()
+
+    result["settings"] = {k: v for k, v in vars(args).items() if k != "output"}
+    print(f"/optimize-route: {result['requests']} requests, concurrency {result['concurrency']}, "
+          f"{result['errors']} errors")
+    print(f"  throughput {result['throughput_rps']} req/s over {result['wall_seconds']} s")
+    print_latency("latency", result["latency"])
+    if args.output:
+        write_report(args.output, {"optimize_route_load": result})
+
+if __name__ == "__main__":
+    main()
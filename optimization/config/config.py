@@ -9,4 +9,7 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
  
-DATABASE_URI = "sqlite:///truck_routes.db"`
\ No newline at end of file
+# Absolute, so Flask-SQLAlchemy does not resolve it under the instance
+# folder (here a file, not a directory)
+DATABASE_URI = os.getenv("DATABASE_URI",
+                         f"sqlite:///{os.path.join(os.path.dirname(Config.BASE_DIR), 'truck_routes.db')}")
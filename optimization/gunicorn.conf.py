@@ -0,0 +1,18 @@
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+wsgi_app = "run:app"
+
+# With CHATBOT_MODEL_MODE=eager the master loads the model in create_app
+# and the forked workers share its memory copy-on-write instead of each
+# loading their own
+preload_app = os.getenv("CHATBOT_MODEL_MODE", "lazy").lower() == "eager"
+
+def post_fork(server, worker):
+    if preload_app:
+        # Database connections opened by the master must not be shared
+        from run import app
+        from models.database import db
+        with app.app_context():
+            db.engine.dispose()
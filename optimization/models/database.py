@@ -1,15 +1,126 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, event, or_
+
+from utils.polyline import GEOMETRY_PREFIX, decode_geometry, encode_geometry
 
 # Initialize SQLAlchemy
 db = SQLAlchemy()
 
 class RouteMetadata(db.Model):
     __tablename__ = "route_metadata"
+    __table_args__ = (
+        # Keyset pagination walks (timestamp, id); the filtered variants
+        # keep pickup/dropoff lookups on an index too
+        db.Index("ix_route_metadata_timestamp_id", "timestamp", "id"),
+        db.Index("ix_route_metadata_pickup_timestamp_id", "pickup_location", "timestamp", "id"),
+        db.Index("ix_route_metadata_dropoff_timestamp_id", "dropoff_location", "timestamp", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     pickup_location = db.Column(db.String(255), nullable=False)
     dropoff_location = db.Column(db.String(255), nullable=False)
-    optimized_route = db.Column(db.Text, nullable=False)
+    optimized_route = db.Column(db.Text, nullable=False)  # utils.polyline.encode_geometry
     distance = db.Column(db.Float, nullable=False)  # Distance in km
     duration = db.Column(db.Float, nullable=False)  # Duration in minutes
-    timestamp = db.Column(db.DateTime, default=db.func.current_timestamp())
\ No newline at end of file
+    timestamp = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+def ensure_indexes():
+    """
+    create_all() skips indexes on tables that already exist, so add any
+    that an older database is missing
+    """
+    for index in RouteMetadata.__table__.indexes:
+        index.create(bind=db.engine, checkfirst=True)
+
+def migrate_route_geometry(batch_size=1000):
+    """
+    Rewrite optimized_route values stored as str(list_of_tuples) in the
+    polyline format, batch_size rows per transaction.
+
+    Returns:
+        tuple: (rows converted, ids of rows that could not be parsed)
+    """
+    table = RouteMetadata.__table__
+    converted, failed, last_id = 0, [], 0
+    while True:
+        rows = db.session.execute(
+            db.select(table.c.id, table.c.optimized_route)
+            .where(table.c.id > last_id, ~table.c.optimized_route.startswith(GEOMETRY_PREFIX))
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return converted, failed
+        updates = []
+        for row_id, text in rows:
+            try:
+                updates.append({"row_id": row_id, "route": encode_geometry(decode_geometry(text))})
+            except ValueError:
+                failed.append(row_id)
+        if updates:
+            db.session.execute(
+                table.update().where(table.c.id == db.bindparam("row_id"))
+                .values(optimized_route=db.bindparam("route")),
+                updates,
+            )
+        db.session.commit()
+        converted += len(updates)
+        last_id = rows[-1][0]
+
+# WAL lets readers run alongside the writer, and with synchronous=NORMAL a
+# commit no longer waits for an fsync (the last commits can be lost on
+# power failure, never corrupted)
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",  # 20 MB page cache
+)
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+def configure_sqlite(engine):
+    """Apply SQLITE_PRAGMAS to every new connection of a SQLite engine"""
+    if engine.dialect.name != "sqlite":
+        return
+    if not event.contains(engine, "connect", _apply_sqlite_pragmas):
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+        # Connections opened before the listener was added miss the pragmas
+        engine.dispose()
+
+def routes_history_page(limit, after=None, pickup=None, dropoff=None, since=None, until=None):
+    """
+    One page of route history, newest first.
+
+    Args:
+        limit: Maximum rows to return
+        after: (timestamp, id) of the last row of the previous page
+        pickup, dropoff: Exact location filters
+        since, until: Inclusive datetime bounds on timestamp
+
+    Returns:
+        list: RouteMetadata rows
+    """
+    query = RouteMetadata.query
+    if pickup is not None:
+        query = query.filter(RouteMetadata.pickup_location == pickup)
+    if dropoff is not None:
+        query = query.filter(RouteMetadata.dropoff_location == dropoff)
+    if since is not None:
+        query = query.filter(RouteMetadata.timestamp >= since)
+    if until is not None:
+        query = query.filter(RouteMetadata.timestamp <= until)
+    if after is not None:
+        timestamp, row_id = after
+        query = query.filter(or_(
+            RouteMetadata.timestamp < timestamp,
+            and_(RouteMetadata.timestamp == timestamp, RouteMetadata.id < row_id),
+        ))
+    return (query.order_by(RouteMetadata.timestamp.desc(), RouteMetadata.id.desc())
+            .limit(limit)
+            .all())
@@ -0,0 +1,217 @@
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, StatementError
+
+from models.database import db, RouteMetadata
+from utils.metrics import register_collector
+
+# Rows are buffered and written in one transaction when ROUTE_WRITE_BATCH
+# have queued or the oldest has waited ROUTE_WRITE_DELAY_MS. Set
+# ROUTE_WRITE_BEHIND=0 to commit every add() before it returns.
+ROUTE_WRITE_BEHIND = os.getenv("ROUTE_WRITE_BEHIND", "1") == "1"
+ROUTE_WRITE_BATCH = int(os.getenv("ROUTE_WRITE_BATCH", "200"))
+ROUTE_WRITE_DELAY_MS = float(os.getenv("ROUTE_WRITE_DELAY_MS", "250"))
+# Past this many unwritten rows, add() writes inline instead of buffering
+ROUTE_WRITE_MAX_PENDING = int(os.getenv("ROUTE_WRITE_MAX_PENDING", "10000"))
+# Rows the database rejects are appended here, one JSON object per line
+ROUTE_WRITE_DEAD_LETTER = os.getenv(
+    "ROUTE_WRITE_DEAD_LETTER",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "route_writes_rejected.jsonl"))
+
+def _rejects_rows(error):
+    """
+    True if error is about the rows written (a constraint, or a value the
+    column cannot take) rather than the database being unavailable
+    """
+    if isinstance(error, (IntegrityError, DataError)):
+        return True
+    # Raised while binding parameters, before anything reached the database
+    return isinstance(error, StatementError) and not isinstance(error, DBAPIError)
+
+def _utcnow():
+    # Naive UTC, like SQLite's CURRENT_TIMESTAMP default
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class RouteWriteBuffer:
+    """
+    Write-behind buffer for RouteMetadata rows.
+
+    Requests hand rows to add() and return at once; a background thread
+    bulk-inserts them through the engine directly, so it needs no Flask
+    app context. A batch the database rejects is halved until the rows at
+    fault are found; those go to the dead-letter log and the rest are
+    written. Any other failed flush keeps its rows for the next attempt.
+    """
+
+    def __init__(self, engine, max_rows=ROUTE_WRITE_BATCH, max_delay_ms=ROUTE_WRITE_DELAY_MS,
+                 max_pending=ROUTE_WRITE_MAX_PENDING, dead_letter_path=ROUTE_WRITE_DEAD_LETTER,
+                 background=True):
+        self.engine = engine
+        self.max_rows = max_rows
+        self.max_delay = max_delay_ms / 1000
+        self.max_pending = max_pending
+        self.dead_letter_path = dead_letter_path
+        self._rows = []
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self.rows_written = 0
+        self.flushes = 0
+        self.errors = 0
+        self.last_error = None
+        self.rows_rejected = 0
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._loop, name="route-writer", daemon=True)
+            self._thread.start()
+
+    def add(self, **row):
+        self.add_many([row])
+
+    def add_many(self, rows):
+        """
+        Queue rows (RouteMetadata column values). Timestamps are taken
+        now, not at flush time.
+        """
+        now = _utcnow()
+        rows = [dict(row, timestamp=row.get("timestamp") or now) for row in rows]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Route writer is closed.")
+            was_empty = not self._rows
+            if was_empty:
+                self._oldest = time.monotonic()
+            self._rows.extend(rows)
+            backlog = len(self._rows)
+            if was_empty or backlog >= self.max_rows:
+                # Start the delay timer, or write a full batch now
+                self._cond.notify()
+        if self._thread is None or backlog >= self.max_pending:
+            # Synchronous mode, or the writer has fallen behind: the caller
+            # pays for the write instead of growing the buffer further
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far; returns the number of rows written"""
+        with self._write_lock:
+            with self._cond:
+                rows, self._rows, self._oldest = self._rows, [], None
+            if not rows:
+                return 0
+            batches, written = [rows], 0
+            while batches:
+                batch = batches.pop()
+                try:
+                    with self.engine.begin() as conn:
+                        conn.execute(RouteMetadata.__table__.insert(), batch)
+                    written += len(batch)
+                except Exception as e:
+                    with self._cond:
+                        self.errors += 1
+                        self.last_error = str(e)
+                    if not _rejects_rows(e):
+                        # Put back only what is still unwritten, in order
+                        with self._cond:
+                            self._rows[:0] = batch + [row for rest in reversed(batches) for row in rest]
+                            self._oldest = self._oldest or time.monotonic()
+                        self.rows_written += written
+                        raise
+                    if len(batch) == 1:
+                        self._dead_letter(batch[0], e)
+                    else:
+                        mid = len(batch) // 2
+                        batches += [batch[mid:], batch[:mid]]
+            self.rows_written += written
+            self.flushes += 1
+            return written
+
+    def _dead_letter(self, row, error):
+        self.rows_rejected += 1
+        if not self.dead_letter_path:
+            return
+        record = {"rejected_at": _utcnow().isoformat(), "error": str(error).splitlines()[0], "row": row}
+        try:
+            with open(self.dead_letter_path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError:
+            pass  # Counted in rows_rejected; the row must not block the buffer
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if len(self._rows) >= self.max_rows:
+                        break
+                    if self._rows:
+                        remaining = self._oldest + self.max_delay - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                # The database is unavailable and the rows were put back;
+                # back off before retrying
+                time.sleep(self.max_delay)
+
+    def close(self):
+        """Stop the background thread and write whatever is left"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pending": len(self._rows),
+                "rows_written": self.rows_written,
+                "flushes": self.flushes,
+                "mean_rows_per_flush": round(self.rows_written / self.flushes, 2) if self.flushes else 0.0,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "rows_rejected": self.rows_rejected,
+                "write_behind": self._thread is not None,
+            }
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_route_writer():
+    """
+    The process-wide writer, bound to the current app's engine. Must first
+    be called inside an app context; created lazily so that each forked
+    worker gets its own thread.
+    """
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                engine = db.engine
+                # Each thread sees its own in-memory SQLite database
+                in_memory = engine.dialect.name == "sqlite" and engine.url.database in (None, "", ":memory:")
+                _writer = RouteWriteBuffer(engine, background=ROUTE_WRITE_BEHIND and not in_memory)
+                atexit.register(_writer.close)
+    return _writer
+
+def flush_route_writes():
+    """Write pending rows, if a writer exists; for readers that need them"""
+    if _writer is not None:
+        _writer.flush()
+
+register_collector("catnip_route_writer", lambda: _writer.stats() if _writer is not None else None,
+                   "Write-behind RouteMetadata buffer statistics.")
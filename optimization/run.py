@@ -1,6 +1,14 @@
+import time
+
+_started = time.perf_counter()
+
 from app import create_app
 
 app = create_app()
 
+# Import plus create_app; CHATBOT_MODEL_MODE=eager includes loading the model
+STARTUP_SECONDS = time.perf_counter() - _started
+
 if __name__ == "__main__":
+    print(f"Started in {STARTUP_SECONDS:.2f}s")
     app.run(debug=True)
@@ -0,0 +1,365 @@
+import csv
+import heapq
+import json
+import os
+from math import sin, cos, sqrt, atan2, inf
+
+import numpy as np
+
+from utils.distance import EARTH_RADIUS_M
+from utils.spatial_index import build_spatial_index
+
+class CSRGraph:
+    """
+    Compressed sparse row road graph.
+
+    Edges leaving node ``u`` are ``targets[offsets[u]:offsets[u + 1]]``
+    with matching ``weights`` (meters) and ``durations`` (seconds). Nodes
+    are integer ids; ``names`` and ``coords`` (lat, lon) are optional and
+    indexed by id. Undirected graphs store both directions of each edge.
+    """
+
+    ARRAYS = ("offsets", "targets", "weights", "durations", "coords")
+
+    def __init__(self, offsets, targets, weights, durations, coords=None, names=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.durations = durations
+        self.coords = coords
+        self.names = list(names) if names is not None else None
+        self._ids = None
+        self._index = None
+        self._coords_rad = None
+        self.landmarks = None
+
+    @property
+    def num_nodes(self):
+        return len(self.offsets) - 1
+
+    @property
+    def num_edges(self):
+        return len(self.targets)
+
+    # Construction
+
+    @classmethod
+    def from_edges(cls, sources, targets, weights, durations=None, num_nodes=None,
+                   coords=None, names=None, directed=False):
+        """
+        Build from parallel edge arrays. Durations default to weights
+        divided by the average speed used in utils.routing.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        if durations is None:
+            from utils.routing import AVERAGE_SPEED_MPS
+            durations = weights / AVERAGE_SPEED_MPS
+        durations = np.asarray(durations, dtype=np.float64)
+
+        if not directed:
+            sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+            weights = np.concatenate([weights, weights])
+            durations = np.concatenate([durations, durations])
+
+        if num_nodes is None:
+            if coords is not None:
+                num_nodes = len(coords)
+            elif names is not None:
+                num_nodes = len(names)
+            else:
+                num_nodes = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+
+        order = np.argsort(sources, kind="stable")
+        counts = np.bincount(sources, minlength=num_nodes)
+        offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        if coords is not None:
+            coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+
+        return cls(offsets, targets[order].astype(np.int32 if num_nodes < 2**31 else np.int64),
+                   weights[order], durations[order], coords, names)
+
+    @classmethod
+    def from_networkx(cls, G):
+        """Convert a utils.routing style networkx graph"""
+        names = list(G.nodes())
+        ids = {name: i for i, name in enumerate(names)}
+        coords = [G.nodes[n]['pos'] for n in names]
+        edges = list(G.edges(data=True))
+        return cls.from_edges(
+            [ids[u] for u, _, _ in edges],
+            [ids[v] for _, v, _ in edges],
+            [d['weight'] for _, _, d in edges],
+            [d['duration'] for _, _, d in edges],
+            num_nodes=len(names), coords=coords, names=names,
+            directed=G.is_directed(),
+        )
+
+    @classmethod
+    def from_edge_list(cls, edges_path, nodes_path=None, directed=False, delimiter=","):
+        """
+        Load an edge-list file of ``source,target,weight[,duration]`` rows
+        with integer node ids. The optional nodes file has ``name,lat,lon``
+        rows where row ``i`` describes node ``i``. Both files may start with
+        a header line.
+        """
+        edges = _loadtxt(edges_path, delimiter)
+        durations = edges[:, 3] if edges.shape[1] > 3 else None
+
+        coords = names = None
+        if nodes_path is not None:
+            with open(nodes_path, newline="") as f:
+                reader = csv.reader(f, delimiter=delimiter)
+                rows = list(reader)
+            if rows and not _is_number(rows[0][1]):
+                rows = rows[1:]
+            names = [row[0] for row in rows]
+            coords = np.array([(float(row[1]), float(row[2])) for row in rows])
+
+        return cls.from_edges(edges[:, 0].astype(np.int64), edges[:, 1].astype(np.int64),
+                              edges[:, 2], durations, coords=coords, names=names,
+                              directed=directed)
+
+    # Persistence
+
+    def save(self, directory):
+        """Write the arrays as .npy files so they can be memory-mapped"""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            array = getattr(self, name)
+            if array is not None:
+                np.save(os.path.join(directory, f"{name}.npy"), np.asarray(array))
+        if self.names is not None:
+            with open(os.path.join(directory, "names.json"), "w") as f:
+                json.dump(self.names, f)
+
+    @classmethod
+    def load(cls, directory, mmap=False):
+        """Load a graph written by save(), memory-mapping arrays if asked"""
+        mode = "r" if mmap else None
+        arrays = {}
+        for name in cls.ARRAYS:
+            path = os.path.join(directory, f"{name}.npy")
+            arrays[name] = np.load(path, mmap_mode=mode) if os.path.exists(path) else None
+
+        names = None
+        names_path = os.path.join(directory, "names.json")
+        if os.path.exists(names_path):
+            with open(names_path) as f:
+                names = json.load(f)
+        return cls(names=names, **arrays)
+
+    # Lookups
+
+    def node_id(self, node):
+        if isinstance(node, (int, np.integer)):
+            return int(node)
+        if self._ids is None:
+            if self.names is None:
+                raise KeyError(node)
+            self._ids = {name: i for i, name in enumerate(self.names)}
+        return self._ids[node]
+
+    def node_name(self, node_id):
+        return self.names[node_id] if self.names is not None else node_id
+
+    def nearest_node(self, coords):
+        if self._index is None:
+            self._index = build_spatial_index(range(self.num_nodes), self.coords)
+        return self._index.nearest_name(coords)
+
+    def _heuristic(self, target):
+        """Admissible haversine lower bound to target, in meters"""
+        if self._coords_rad is None:
+            self._coords_rad = np.radians(np.asarray(self.coords)).tolist()
+        coords = self._coords_rad
+        lat2, lon2 = coords[target]
+        cos_lat2 = cos(lat2)
+
+        def heuristic(u):
+            lat1, lon1 = coords[u]
+            a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos_lat2 * sin((lon2 - lon1) / 2) ** 2
+            return 2 * EARTH_RADIUS_M * atan2(sqrt(a), sqrt(1 - a))
+
+        return heuristic
+
+    def use_landmarks(self, index):
+        """Answer queries with ALT using a utils.landmarks.LandmarkIndex"""
+        if index is not None and not index.matches(self):
+            raise ValueError("Landmark tables were built for a different graph.")
+        self.landmarks = index
+
+    # Search
+
+    def search(self, source, target=None, heuristic=None, targets=None, with_durations=False,
+               adjacency=None):
+        """
+        Heap-based Dijkstra, or A* when ``heuristic(node_id)`` is given.
+
+        Returns (dist, pred_edge): dicts from node id to distance and to the
+        index of the edge the node was reached through. With a target the
+        search stops as soon as the target is settled; with a set of
+        ``targets`` (Dijkstra only) it stops once all of them are settled.
+        ``with_durations`` adds a third dict with the duration along each
+        node's shortest path, accumulated during the search. ``adjacency``
+        is a dict reused across searches to hold each visited node's edges
+        as Python lists, so repeated searches skip the array slicing.
+        """
+        remaining = set(targets) if targets is not None else None
+        offsets, targets, weights, durations = self.offsets, self.targets, self.weights, self.durations
+        dist = {source: 0.0}
+        pred_edge = {source: -1}
+        dur = {source: 0.0} if with_durations else None
+        settled = set()
+        heap = [(heuristic(source) if heuristic else 0.0, 0.0, source)]
+
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if u in settled:
+                continue
+            settled.add(u)
+            if u == target:
+                break
+            if remaining is not None:
+                remaining.discard(u)
+                if not remaining:
+                    break
+
+            edges = adjacency.get(u) if adjacency is not None else None
+            if edges is None:
+                start, end = int(offsets[u]), int(offsets[u + 1])
+                edges = list(zip(range(start, end), targets[start:end].tolist(),
+                                 weights[start:end].tolist(), durations[start:end].tolist()))
+                if adjacency is not None:
+                    adjacency[u] = edges
+            for e, v, w, t in edges:
+                nd = d + w
+                if nd < dist.get(v, inf):
+                    dist[v] = nd
+                    pred_edge[v] = e
+                    if dur is not None:
+                        dur[v] = dur[u] + t
+                    heapq.heappush(heap, (nd + heuristic(v) if heuristic else nd, nd, v))
+
+        if dur is not None:
+            return dist, pred_edge, dur
+        return dist, pred_edge
+
+    def single_source_distances(self, source):
+        """Dense array of shortest distances from source (inf if unreachable)"""
+        dist, _ = self.search(self.node_id(source))
+        out = np.full(self.num_nodes, inf)
+        out[list(dist.keys())] = list(dist.values())
+        return out
+
+    def _edge_sources(self, edges):
+        return np.searchsorted(self.offsets, edges, side="right") - 1
+
+    def path_edges(self, pred_edge, target):
+        """Edge indices from the search source to target, in order"""
+        edges = []
+        e = pred_edge[target]
+        while e != -1:
+            edges.append(e)
+            e = pred_edge[int(self._edge_sources(e))]
+        edges.reverse()
+        return edges
+
+    def shortest_path(self, source, target, heuristic="auto"):
+        """
+        (node ids, edge indices) along the shortest path, or None if
+        unreachable. ``heuristic`` is "alt", "haversine" (needs coords),
+        None for plain Dijkstra, or "auto" to use landmarks when attached.
+        """
+        source, target = self.node_id(source), self.node_id(target)
+        if heuristic == "auto":
+            heuristic = "alt" if self.landmarks is not None else "haversine"
+        if heuristic == "alt":
+            heuristic = self.landmarks.heuristic(target)
+        elif heuristic == "haversine":
+            heuristic = self._heuristic(target) if self.coords is not None else None
+        dist, pred_edge = self.search(source, target, heuristic)
+        if target not in dist:
+            return None
+        edges = self.path_edges(pred_edge, target)
+        return [source] + [int(self.targets[e]) for e in edges], edges
+
+    def route_result(self, nodes, edges):
+        """Build the utils.routing.get_route_data result dict for a path"""
+        distance = float(np.sum(self.weights[edges])) if edges else 0.0
+        duration = float(np.sum(self.durations[edges])) if edges else 0.0
+        path = [self.node_name(n) for n in nodes]
+        geometry = ([tuple(float(x) for x in self.coords[n]) for n in nodes]
+                    if self.coords is not None else [])
+        return {
+            "geometry": geometry,
+            "distance": round(distance/1000, 2),  # Distance in kilometers
+            "duration": round(duration/3600, 2),  # Duration in hours
+            "path": path,
+            "start_city": path[0],
+            "end_city": path[-1]
+        }
+
+    def route_many(self, start_node, end_nodes):
+        """
+        Routes from one node to many with a single Dijkstra run. Returns a
+        dict from end node to result dict, or None where unreachable.
+        """
+        source = self.node_id(start_node)
+        ids = {end: self.node_id(end) for end in end_nodes}
+        dist, pred_edge = self.search(source, targets=ids.values())
+
+        results = {}
+        for end, target in ids.items():
+            if target not in dist:
+                results[end] = None
+                continue
+            edges = self.path_edges(pred_edge, target)
+            results[end] = self.route_result([source] + [int(self.targets[e]) for e in edges], edges)
+        return results
+
+    def cost_matrix(self, nodes):
+        """
+        (distance, duration) matrices in meters and seconds between every
+        pair of ``nodes``, with one multi-target Dijkstra per node. Durations
+        are summed during each search, not by walking paths afterwards.
+        Pairs with no path are inf.
+        """
+        ids = [self.node_id(n) for n in nodes]
+        distance = np.full((len(ids), len(ids)), inf)
+        duration = np.full((len(ids), len(ids)), inf)
+        adjacency = {}
+        for i, source in enumerate(ids):
+            dist, _, dur = self.search(source, targets=ids, with_durations=True, adjacency=adjacency)
+            found = [(j, target) for j, target in enumerate(ids) if target in dist]
+            if found:
+                columns, reached = zip(*found)
+                distance[i, list(columns)] = [dist[t] for t in reached]
+                duration[i, list(columns)] = [dur[t] for t in reached]
+        return distance, duration
+
+    def route_nodes(self, start_node, end_node, heuristic="auto"):
+        found = self.shortest_path(start_node, end_node, heuristic)
+        if found is None:
+            return None
+        return self.route_result(*found)
+
+    def route(self, start_coords, end_coords):
+        """Same contract as utils.routing.get_route_data"""
+        return self.route_nodes(self.nearest_node(start_coords), self.nearest_node(end_coords))
+
+def _is_number(value):
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+def _loadtxt(path, delimiter):
+    with open(path) as f:
+        first = f.readline()
+    skip = 0 if first and _is_number(first.split(delimiter)[0]) else 1
+    return np.loadtxt(path, delimiter=delimiter, skiprows=skip, ndmin=2)
@@ -0,0 +1,88 @@
+"""
+Great circle distances for the optimization package.
+
+Everything here works in meters on (latitude, longitude) pairs given in
+decimal degrees. The scalar function is for one-off calls in Python code
+(A* heuristics, edge weights); the array functions are for anything that
+touches many points at once.
+"""
+from math import radians, sin, cos, sqrt, atan2
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000  # Radius of earth in meters
+
+# Rows per block for matrices; 4096 x 4096 float64 blocks are 128 MB
+DEFAULT_CHUNK_SIZE = 4096
+
+def haversine_scalar(lat1, lon1, lat2, lon2):
+    """Great circle distance in meters between two points, using math"""
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    return c * EARTH_RADIUS_M
+
+def haversine(lat1, lon1, lat2, lon2, dtype=np.float64):
+    """
+    Elementwise great circle distance in meters. Inputs broadcast like any
+    NumPy ufunc, so a column against a row gives a full matrix.
+
+    The trigonometry always runs in float64; float32 inputs lose hundreds
+    of meters near the poles. ``dtype`` only sets the result type.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    # Rounding can push a a hair outside [0, 1] for (near) antipodal points
+    a = np.clip(a, 0, 1)
+    return (2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))).astype(dtype, copy=False)
+
+def _as_points(points):
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+def one_to_many(point, points, dtype=np.float64):
+    """Distances in meters from one (lat, lon) to an (n, 2) array of points"""
+    points = _as_points(points)
+    return haversine(point[0], point[1], points[:, 0], points[:, 1], dtype=dtype)
+
+def iter_distance_chunks(a, b=None, dtype=np.float64, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield (row_offset, block) pieces of the (len(a), len(b)) distance
+    matrix, so callers can reduce very large matrices in bounded memory.
+    """
+    a = _as_points(a)
+    b = a if b is None else _as_points(b)
+    lat2, lon2 = b[:, 0], b[:, 1]
+    for start in range(0, len(a), chunk_size):
+        rows = a[start:start + chunk_size]
+        yield start, haversine(rows[:, :1], rows[:, 1:], lat2, lon2, dtype=dtype)
+
+def distance_matrix(a, b=None, dtype=np.float64, chunk_size=DEFAULT_CHUNK_SIZE, out=None):
+    """
+    Pairwise distances in meters between (m, 2) points ``a`` and (n, 2)
+    points ``b`` (``a`` against itself when ``b`` is None). Pass ``out``,
+    e.g. an np.memmap, to fill a preallocated matrix chunk by chunk.
+    """
+    a = _as_points(a)
+    n = len(a) if b is None else len(_as_points(b))
+    if out is None:
+        out = np.empty((len(a), n), dtype=dtype)
+    for start, block in iter_distance_chunks(a, b, dtype, chunk_size):
+        out[start:start + len(block)] = block
+    return out
+
+def nearest_indices(queries, points, dtype=np.float64, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Index into ``points`` of the closest point to each query, computed
+    chunk by chunk without materialising the full matrix
+    """
+    queries = _as_points(queries)
+    if not len(_as_points(points)):
+        raise ValueError("No points to search.")
+    result = np.empty(len(queries), dtype=np.int64)
+    for start, block in iter_distance_chunks(queries, points, dtype, chunk_size):
+        result[start:start + len(block)] = np.argmin(block, axis=1)
+    return result
@@ -1,14 +1,299 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from utils.metrics import counter, histogram
+from utils.routing import INDIA_CITIES
+
+# Example using OpenStreetMap's Nominatim API; point NOMINATIM_URL at a
+# local stub server in tests
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+# Kept beside the app's SQLite database so cached places survive restarts
+# and are shared by every worker; ":memory:" keeps them per process
+GEOCODE_CACHE_PATH = os.getenv(
+    "GEOCODE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "geocode_cache.db"))
+GEOCODE_TIMEOUT = float(os.getenv("GEOCODE_TIMEOUT", "5"))
+# Nominatim's usage policy allows at most one request per second; a
+# self-hosted server can set 0 and let lookups overlap
+GEOCODE_MIN_INTERVAL = float(os.getenv("GEOCODE_MIN_INTERVAL", "1.0"))
+GEOCODE_WORKERS = int(os.getenv("GEOCODE_WORKERS", "8"))
+
+GEOCODE_LOOKUPS = counter("catnip_geocode_lookups_total",
+                          "Successful geocodes by source: gazetteer, cache, remote or fallback.", ("source",))
+GEOCODE_ERRORS = counter("catnip_geocode_errors_total", "Geocoder lookups that raised.", ("error",))
+GEOCODE_REMOTE_SECONDS = histogram("catnip_geocode_remote_seconds",
+                                   "Latency of remote geocoding calls, including rate limiting.")
+
+POSITIVE_TTL = 30 * 24 * 3600  # Places rarely move
+NEGATIVE_TTL = 24 * 3600  # Retry unknown names daily
+
+# Common alternative names for the cities in the routing graph
+ALIASES = {
+    "new delhi": "Delhi",
+    "bombay": "Mumbai",
+    "bengaluru": "Bangalore",
+    "madras": "Chennai",
+    "calcutta": "Kolkata",
+    "cochin": "Kochi",
+    "vizag": "Visakhapatnam",
+    "benares": "Varanasi",
+    "banaras": "Varanasi",
+}
+
+def normalize_query(location):
+    """Canonical cache key: casefolded, single-spaced, no country suffix"""
+    query = re.sub(r"\s+", " ", str(location)).strip().casefold()
+    query = re.sub(r"\s*,\s*", ", ", query).strip(" ,")
+    return re.sub(r",? india$", "", query)
+
+def _seed_gazetteer():
+    gazetteer = {normalize_query(name): coords for name, coords in INDIA_CITIES.items()}
+    for alias, name in ALIASES.items():
+        gazetteer[alias] = INDIA_CITIES[name]
+    return gazetteer
+
+class GeocodeCache:
+    """
+    SQLite cache of normalized query -> coordinates. Misses are cached
+    too ("negative caching") with a shorter TTL.
+    """
+
+    def __init__(self, path=":memory:", ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        if path != ":memory:":
+            # Several worker processes read and write the same file
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS geocode_cache ("
+            " query TEXT PRIMARY KEY,"
+            " lat REAL,"
+            " lon REAL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, query):
+        """
+        (True, (lat, lon)) for a cached hit, (True, None) for a cached
+        "not found", (False, None) when there is nothing fresh
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT lat, lon, expires_at FROM geocode_cache WHERE query = ?", (query,)
+            ).fetchone()
+        if row is None or row[2] < time.time():
+            return False, None
+        lat, lon, _ = row
+        return True, (None if lat is None else (lat, lon))
+
+    def put(self, query, coords):
+        ttl = self.ttl if coords is not None else self.negative_ttl
+        lat, lon = coords if coords is not None else (None, None)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO geocode_cache VALUES (?, ?, ?, ?)",
+                (query, lat, lon, time.time() + ttl),
+            )
+            self._db.commit()
+
+    def purge_expired(self):
+        with self._lock:
+            self._db.execute("DELETE FROM geocode_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+class NominatimClient:
+    """
+    Nominatim search over one pooled HTTP session, spacing requests at
+    least min_interval seconds apart across all threads
+    """
+
+    def __init__(self, base_url=NOMINATIM_URL, timeout=GEOCODE_TIMEOUT,
+                 min_interval=GEOCODE_MIN_INTERVAL, pool_size=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "catnip-route-optimizer/1.0"
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._rate_lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _wait_for_slot(self):
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def search(self, location):
+        """(lat, lon) of the best match, or None if nothing matched"""
+        start = time.perf_counter()
+        try:
+            self._wait_for_slot()
+            response = self.session.get(
+                f"{self.base_url}/search",
+                params={"q": location, "format": "json", "limit": 1},
+                timeout=self.timeout,
+            )
+        finally:
+            GEOCODE_REMOTE_SECONDS.observe(time.perf_counter() - start)
+        response.raise_for_status()
+        data = response.json()
+        if not data:
+            return None
+        return float(data[0]["lat"]), float(data[0]["lon"])
+
+class Geocoder:
+    """
+    Resolve place names: local gazetteer first, then the cache, then the
+    remote service. If the remote lookup fails or finds nothing, a known
+    city named anywhere in the query ("Andheri, Mumbai") is used instead.
+    """
+
+    def __init__(self, client=None, cache=None, gazetteer=None):
+        self.client = client if client is not None else NominatimClient()
+        self.cache = cache if cache is not None else GeocodeCache(GEOCODE_CACHE_PATH)
+        self.gazetteer = gazetteer if gazetteer is not None else _seed_gazetteer()
+
+    def add_place(self, name, coords):
+        self.gazetteer[normalize_query(name)] = tuple(coords)
+
+    def _fallback(self, query):
+        for part in reversed(query.split(", ")):
+            if part in self.gazetteer:
+                return self.gazetteer[part]
+        return None
+
+    def geocode(self, location):
+        try:
+            return self._geocode(location)
+        except Exception as e:
+            GEOCODE_ERRORS.inc(type(e).__name__)
+            raise
+
+    def _geocode(self, location):
+        query = normalize_query(location)
+        if not query:
+            raise ValueError("Location must not be empty.")
+        if query in self.gazetteer:
+            GEOCODE_LOOKUPS.inc("gazetteer")
+            return self.gazetteer[query]
+
+        found, coords = self.cache.get(query)
+        source = "cache"
+        if not found:
+            try:
+                coords = self.client.search(location)
+            except requests.RequestException:
+                # Transient failures are not cached; fall back for this call only
+                coords = self._fallback(query)
+                if coords is None:
+                    raise
+                GEOCODE_LOOKUPS.inc("fallback")
+                return coords
+            source = "remote"
+            self.cache.put(query, coords)
+
+        if coords is None:
+            coords = self._fallback(query)
+            source = "fallback"
+        if coords is None:
+            raise ValueError(f"Location '{location}' not found.")
+        GEOCODE_LOOKUPS.inc(source)
+        return coords
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+def get_geocoder():
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = Geocoder()
+    return _geocoder
+
+def set_geocoder(geocoder):
+    """Swap the process-wide geocoder, e.g. for one pointed at a stub server"""
+    global _geocoder
+    _geocoder = geocoder
 
 def get_geocoordinates(location):
-    # Example using OpenStreetMap's Nominatim API
-    response = requests.get(
-        "https://nominatim.openstreetmap.org/search",
-        params={"q": location, "format": "json"},
-    )
-    data = response.json()
-    if not data:
-        raise ValueError(f"Location '{location}' not found.")
-
-    lat, lon = float(data[0]["lat"]), float(data[0]["lon"])
-    return lat, lon
+    return get_geocoder().geocode(location)
+
+_executor = None
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _geocoder_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=GEOCODE_WORKERS,
+                                               thread_name_prefix="geocode")
+    return _executor
+
+def geocode_pair(pickup, dropoff):
+    """
+    Geocode both ends of a route concurrently. Raises the pickup's error
+    first if both fail.
+    """
+    if normalize_query(pickup) == normalize_query(dropoff):
+        coords = get_geocoordinates(pickup)
+        return coords, coords
+    dropoff_future = _get_executor().submit(get_geocoordinates, dropoff)
+    # The request thread does one lookup itself instead of idling
+    try:
+        pickup_coords = get_geocoordinates(pickup)
+    except Exception:
+        dropoff_future.cancel()
+        raise
+    return pickup_coords, dropoff_future.result()
+
+def geocode_many(locations, max_workers=GEOCODE_WORKERS, return_exceptions=False):
+    """
+    Geocode many addresses with at most max_workers lookups in flight.
+    Duplicates (after normalization) are looked up once.
+
+    Returns a list aligned with locations. With return_exceptions, failed
+    entries hold the exception instead of raising the first one.
+    """
+    locations = list(locations)
+    unique = {}
+    for location in locations:
+        unique.setdefault(normalize_query(location), location)
+
+    def lookup(location):
+        try:
+            return get_geocoordinates(location)
+        except Exception as e:
+            return e
+
+    workers = max(1, min(max_workers, len(unique)))
+    if workers == 1:
+        resolved = [lookup(location) for location in unique.values()]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="geocode-bulk") as pool:
+            resolved = list(pool.map(lookup, unique.values()))
+    by_query = dict(zip(unique, resolved))
+
+    results = [by_query[normalize_query(location)] for location in locations]
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+    return results
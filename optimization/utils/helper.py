@@ -1,10 +1,5 @@
-def haversine(lat1, lon1, lat2, lon2):
-    from math import radians, cos, sin, sqrt, atan2
-
-    R = 6371  # Earth's radius in km
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
+from utils.distance import haversine_scalar
 
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return R * c
\ No newline at end of file
+def haversine(lat1, lon1, lat2, lon2):
+    """Great circle distance in km (see utils.distance for array versions)"""
+    return haversine_scalar(lat1, lon1, lat2, lon2) / 1000
\ No newline at end of file
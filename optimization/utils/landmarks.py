@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import time
+from math import inf
+
+import numpy as np
+
+class LandmarkIndex:
+    """
+    ALT (A*, landmarks, triangle inequality) preprocessing for a CSRGraph.
+
+    ``tables[u, i]`` is the shortest distance between landmark ``i`` and
+    node ``u``. For an undirected graph ``|d(L, t) - d(L, u)|`` is a lower
+    bound on ``d(u, t)`` for every landmark, and the best of those bounds
+    is a much tighter A* heuristic than straight-line distance on a real
+    road network.
+    """
+
+    def __init__(self, landmarks, tables, fingerprint, build_seconds=None):
+        self.landmarks = np.asarray(landmarks, dtype=np.int64)
+        self.tables = tables
+        self.fingerprint = fingerprint
+        self.build_seconds = build_seconds
+
+    @staticmethod
+    def graph_fingerprint(graph):
+        """
+        Content hash of the graph's offsets, targets and weights. Tables
+        built for any other graph, including one with the same edges at
+        different weights, fail matches() and are rebuilt, since stale
+        distances would make the heuristic inadmissible.
+        """
+        digest = hashlib.sha1()
+        for array, dtype in ((graph.offsets, np.int64), (graph.targets, np.int64),
+                             (graph.weights, np.float64)):
+            digest.update(np.ascontiguousarray(array, dtype=dtype).tobytes())
+        return {
+            "num_nodes": int(graph.num_nodes),
+            "num_edges": int(graph.num_edges),
+            "sha1": digest.hexdigest(),
+        }
+
+    def matches(self, graph):
+        return self.fingerprint == self.graph_fingerprint(graph)
+
+    @classmethod
+    def build(cls, graph, num_landmarks=8, seed=0):
+        """
+        Pick landmarks by farthest-point selection and run one full
+        Dijkstra per landmark.
+        """
+        start = time.perf_counter()
+        n = graph.num_nodes
+        num_landmarks = min(num_landmarks, n)
+        rng = np.random.default_rng(seed)
+
+        # The node farthest from a random start makes a good first landmark
+        dist = graph.single_source_distances(int(rng.integers(n)))
+        closest = np.full(n, np.inf)
+        landmarks = []
+        tables = np.empty((n, num_landmarks), dtype=np.float64)
+
+        for i in range(num_landmarks):
+            candidates = np.where(np.isfinite(dist), dist, -1.0) if i == 0 else \
+                np.where(np.isfinite(closest), closest, -1.0)
+            landmark = int(np.argmax(candidates))
+            landmarks.append(landmark)
+
+            dist = graph.single_source_distances(landmark)
+            tables[:, i] = dist
+            closest = np.minimum(closest, dist)
+
+        return cls(landmarks, tables, cls.graph_fingerprint(graph),
+                   build_seconds=time.perf_counter() - start)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "landmarks.npy"), self.landmarks)
+        np.save(os.path.join(directory, "landmark_tables.npy"), np.asarray(self.tables))
+        with open(os.path.join(directory, "landmarks.json"), "w") as f:
+            json.dump({"fingerprint": self.fingerprint, "build_seconds": self.build_seconds}, f)
+
+    @classmethod
+    def load(cls, directory, mmap=False):
+        with open(os.path.join(directory, "landmarks.json")) as f:
+            meta = json.load(f)
+        landmarks = np.load(os.path.join(directory, "landmarks.npy"))
+        tables = np.load(os.path.join(directory, "landmark_tables.npy"),
+                         mmap_mode="r" if mmap else None)
+        return cls(landmarks, tables, meta["fingerprint"], meta.get("build_seconds"))
+
+    @classmethod
+    def load_or_build(cls, graph, directory, num_landmarks=8, mmap=False):
+        """Reuse tables persisted for this graph, rebuilding them if stale"""
+        if os.path.exists(os.path.join(directory, "landmarks.json")):
+            index = cls.load(directory, mmap=mmap)
+            if index.matches(graph) and len(index.landmarks) == min(num_landmarks, graph.num_nodes):
+                return index
+        index = cls.build(graph, num_landmarks)
+        index.save(directory)
+        return index
+
+    def heuristic(self, target):
+        """A* heuristic callable for searches towards target"""
+        tables = self.tables
+        target_row = np.asarray(tables[target]).tolist()
+
+        def heuristic(u):
+            best = 0.0
+            for t, d in zip(target_row, tables[u].tolist()):
+                bound = t - d if t > d else d - t
+                # Landmarks that cannot reach u or the target give inf or
+                # nan here; they say nothing useful, so they are skipped
+                if best < bound < inf:
+                    best = bound
+            return best
+
+        return heuristic
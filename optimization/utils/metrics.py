@@ -0,0 +1,193 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are created once at module level by the code that
+records them and rendered by the /metrics endpoint. Components that keep
+their own statistics (route cache, chatbot batcher, route writer) are
+exported through collectors that are called at scrape time.
+
+With METRICS_ENABLED=0 every record call returns at its first line and
+stage() hands back one shared no-op context manager.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Upper bounds in seconds, from a gazetteer hit to a cold model load
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NOOP = nullcontext()
+_request = threading.local()
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        if not METRICS_ENABLED:
+            return
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(self.labels + ("le",), label_values + (_format_value(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels + ("le",), label_values + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {_format_value(float(series[-2]))}")
+                lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+_metrics = []
+_collectors = []
+_registry_lock = threading.Lock()
+
+def counter(name, help_text, labels=()):
+    metric = Counter(name, help_text, labels)
+    with _registry_lock:
+        _metrics.append(metric)
+    return metric
+
+def histogram(name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+    metric = Histogram(name, help_text, labels, buckets)
+    with _registry_lock:
+        _metrics.append(metric)
+    return metric
+
+def register_collector(prefix, fn, help_text=""):
+    """
+    Export fn() -> dict as gauges named <prefix>_<key> at scrape time.
+    Non-numeric values are skipped; None from fn exports nothing.
+    """
+    with _registry_lock:
+        _collectors.append((prefix, fn, help_text))
+
+def _render_collector(prefix, fn, help_text):
+    try:
+        stats = fn()
+    except Exception:
+        return []
+    lines = []
+    for key, value in sorted((stats or {}).items()):
+        if isinstance(value, bool):
+            value = int(value)
+        if not isinstance(value, (int, float)):
+            continue
+        name = f"{prefix}_{key}"
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_format_value(value)}")
+    return lines
+
+def render():
+    """Every metric and collector in the Prometheus text format"""
+    with _registry_lock:
+        metrics, collectors = list(_metrics), list(_collectors)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for prefix, fn, help_text in collectors:
+        lines.extend(_render_collector(prefix, fn, help_text))
+    return "\n".join(lines) + "\n"
+
+STAGE_SECONDS = histogram("catnip_stage_seconds", "Time spent in each request stage.", ("stage",))
+STAGE_ERRORS = counter("catnip_stage_errors_total", "Stages that raised, by exception type.",
+                       ("stage", "error"))
+
+def start_request_timings():
+    """Start collecting stage durations for the current thread's request"""
+    _request.timings = []
+
+def request_timings():
+    """[(stage, seconds)] recorded since start_request_timings, then reset"""
+    timings = getattr(_request, "timings", None) or []
+    _request.timings = None
+    return timings
+
+class _TimedStage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        if exc_type is not None and issubclass(exc_type, Exception):
+            STAGE_ERRORS.inc(self.name, exc_type.__name__)
+        STAGE_SECONDS.observe(elapsed, self.name)
+        timings = getattr(_request, "timings", None)
+        if timings is not None:
+            timings.append((self.name, elapsed))
+        return False
+
+def stage(name):
+    """Context manager timing one stage of a request into catnip_stage_seconds"""
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _TimedStage(name)
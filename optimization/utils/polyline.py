@@ -0,0 +1,73 @@
+"""
+Compact text encoding for route geometry.
+
+Routes are stored as Google encoded polylines: each coordinate is rounded
+to 1e-5 degrees (about 1 m) and written as a variable-length delta from
+the previous point, a few ASCII characters per point instead of the ~40
+that str() of a float tuple takes. Stored values carry a "p5:" prefix so
+they can be told apart from rows written as str(list_of_tuples) before.
+"""
+import ast
+
+PRECISION = 5
+GEOMETRY_PREFIX = f"p{PRECISION}:"
+
+def _encode_value(value, out):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+def encode_polyline(points, precision=PRECISION):
+    """Encode (lat, lon) pairs as a polyline string"""
+    factor = 10 ** precision
+    out = []
+    prev_lat = prev_lon = 0
+    for lat, lon in points:
+        lat, lon = round(lat * factor), round(lon * factor)
+        _encode_value(lat - prev_lat, out)
+        _encode_value(lon - prev_lon, out)
+        prev_lat, prev_lon = lat, lon
+    return "".join(out)
+
+def decode_polyline(text, precision=PRECISION):
+    """Decode a polyline string back into a list of (lat, lon) tuples"""
+    factor = 10 ** precision
+    points = []
+    values = [0, 0]
+    index, length = 0, len(text)
+    while index < length:
+        for i in (0, 1):
+            result = shift = 0
+            while True:
+                byte = ord(text[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            values[i] += ~(result >> 1) if result & 1 else result >> 1
+        points.append((values[0] / factor, values[1] / factor))
+    return points
+
+def encode_geometry(points):
+    """Value for RouteMetadata.optimized_route"""
+    return GEOMETRY_PREFIX + encode_polyline(points)
+
+def is_encoded(text):
+    return text.startswith(GEOMETRY_PREFIX)
+
+def decode_geometry(text):
+    """
+    Geometry from RouteMetadata.optimized_route, in either the polyline
+    format or the legacy str(list_of_tuples) one. Raises ValueError for
+    anything unreadable.
+    """
+    try:
+        if is_encoded(text):
+            return decode_polyline(text[len(GEOMETRY_PREFIX):])
+        # literal_eval only accepts literals, unlike eval
+        return [(float(lat), float(lon)) for lat, lon in ast.literal_eval(text)]
+    except (IndexError, SyntaxError, TypeError, ValueError, MemoryError, RecursionError):
+        raise ValueError("Unreadable route geometry.") from None
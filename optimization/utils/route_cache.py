@@ -0,0 +1,117 @@
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Returned by RouteCache.get on a miss; None is a valid cached "no route"
+MISS = object()
+
+class RouteCache:
+    """
+    Two-tier cache of get_route_data results keyed by
+    (start_node, end_node, graph_fingerprint).
+
+    The first tier is an in-process LRU. The optional second tier is a
+    SQLite table, so answers survive restarts as long as the graph they
+    were computed on is unchanged.
+    """
+
+    def __init__(self, maxsize=4096, sqlite_path=None):
+        self.maxsize = maxsize
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.sqlite_hits = 0
+        self.misses = 0
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS route_cache ("
+                " start_node TEXT NOT NULL,"
+                " end_node TEXT NOT NULL,"
+                " graph_fingerprint TEXT NOT NULL,"
+                " result TEXT,"
+                " PRIMARY KEY (start_node, end_node, graph_fingerprint))"
+            )
+            self._db.commit()
+
+    def _remember(self, key, result):
+        self._lru[key] = result
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def get(self, start_node, end_node, fingerprint):
+        """Cached result (possibly None for "no route"), or MISS"""
+        key = (start_node, end_node, fingerprint)
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return self._lru[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT result FROM route_cache"
+                    " WHERE start_node = ? AND end_node = ? AND graph_fingerprint = ?",
+                    (str(start_node), str(end_node), fingerprint),
+                ).fetchone()
+                if row is not None:
+                    result = _decode(row[0])
+                    self._remember(key, result)
+                    self.sqlite_hits += 1
+                    return result
+
+            self.misses += 1
+            return MISS
+
+    def put(self, start_node, end_node, fingerprint, result):
+        with self._lock:
+            self._remember((start_node, end_node, fingerprint), result)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO route_cache VALUES (?, ?, ?, ?)",
+                    (str(start_node), str(end_node), fingerprint, json.dumps(result)),
+                )
+                self._db.commit()
+
+    def clear(self):
+        """
+        Drop the in-memory tier. Persisted entries are keyed by fingerprint,
+        so they stay until invalidate() learns which graph is current.
+        """
+        with self._lock:
+            self._lru.clear()
+
+    def invalidate(self, keep_fingerprint):
+        """
+        Drop the in-memory tier and every persisted entry that was not
+        computed on the graph identified by keep_fingerprint
+        """
+        with self._lock:
+            self._lru.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM route_cache WHERE graph_fingerprint != ?",
+                                 (keep_fingerprint,))
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.sqlite_hits + self.misses
+            return {
+                "hits": self.hits,
+                "sqlite_hits": self.sqlite_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.sqlite_hits) / lookups, 4) if lookups else 0.0,
+                "size": len(self._lru),
+                "maxsize": self.maxsize,
+                "persistent": self._db is not None,
+            }
+
+def _decode(text):
+    result = json.loads(text)
+    if result is not None:
+        # JSON has no tuples; restore the (lat, lon) pairs get_route_data returns
+        result["geometry"] = [tuple(point) for point in result["geometry"]]
+    return result
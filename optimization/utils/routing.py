@@ -1,5 +1,21 @@
+import csv
+import hashlib
+import os
+import threading
+
 import networkx as nx
-from math import radians, sin, cos, sqrt, atan2
+import numpy as np
+
+from utils.csr_graph import CSRGraph
+from utils.distance import haversine, haversine_scalar
+from utils.landmarks import LandmarkIndex
+from utils.metrics import counter, register_collector
+from utils.route_cache import MISS, RouteCache
+from utils.spatial_index import build_spatial_index
+
+ROUTE_LOOKUPS = counter("catnip_route_lookups_total",
+                        "Node-to-node route lookups by where the answer came from.", ("source",))
+ROUTE_ERRORS = counter("catnip_route_errors_total", "Route requests that raised.", ("error",))
 
 def haversine_distance(coord1, coord2):
     """
@@ -8,18 +24,62 @@ def haversine_distance(coord1, coord2):
     """
     lat1, lon1 = coord1
     lat2, lon2 = coord2
-    
-    # Convert decimal degrees to radians
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    r = 6371000  # Radius of earth in meters
-    
-    return c * r
+    return haversine_scalar(lat1, lon1, lat2, lon2)
+
+# Define major Indian cities with their coordinates
+# Coordinates are in (latitude, longitude) format
+INDIA_CITIES = {
+    "Delhi": (28.6139, 77.2090),
+    "Mumbai": (19.0760, 72.8777),
+    "Bangalore": (12.9716, 77.5946),
+    "Chennai": (13.0827, 80.2707),
+    "Kolkata": (22.5726, 88.3639),
+    "Hyderabad": (17.3850, 78.4867),
+    "Ahmedabad": (23.0225, 72.5714),
+    "Pune": (18.5204, 73.8567),
+    "Jaipur": (26.9124, 75.7873),
+    "Lucknow": (26.8467, 80.9462),
+    "Bhopal": (23.2599, 77.4126),
+    "Patna": (25.5941, 85.1376),
+    "Nagpur": (21.1458, 79.0882),
+    "Chandigarh": (30.7333, 76.7794),
+    "Kochi": (9.9312, 76.2673),
+    "Visakhapatnam": (17.6868, 83.2185),
+    "Guwahati": (26.1445, 91.7362),
+    "Bhubaneswar": (20.2961, 85.8245),
+    "Varanasi": (25.3176, 82.9739),
+    "Amritsar": (31.6340, 74.8723)
+}
+
+# Define major routes connecting cities
+# These connections roughly follow major highways and railway routes
+INDIA_ROUTES = [
+    # Northern Routes
+    ("Delhi", "Chandigarh"), ("Delhi", "Jaipur"), ("Delhi", "Lucknow"),
+    ("Chandigarh", "Amritsar"), ("Lucknow", "Varanasi"), ("Lucknow", "Patna"),
+
+    # Western Routes
+    ("Mumbai", "Pune"), ("Mumbai", "Ahmedabad"), ("Ahmedabad", "Jaipur"),
+
+    # Central Routes
+    ("Bhopal", "Nagpur"), ("Bhopal", "Delhi"), ("Nagpur", "Mumbai"),
+    ("Bhopal", "Ahmedabad"), ("Nagpur", "Hyderabad"),
+
+    # Eastern Routes
+    ("Kolkata", "Patna"), ("Kolkata", "Bhubaneswar"), ("Kolkata", "Guwahati"),
+
+    # Southern Routes
+    ("Bangalore", "Chennai"), ("Bangalore", "Hyderabad"), ("Chennai", "Hyderabad"),
+    ("Bangalore", "Kochi"), ("Chennai", "Visakhapatnam"), ("Visakhapatnam", "Bhubaneswar"),
+
+    # Additional Cross-Country Routes
+    ("Hyderabad", "Nagpur"), ("Patna", "Varanasi"), ("Jaipur", "Bhopal"),
+    ("Pune", "Bangalore"), ("Ahmedabad", "Bhopal")
+]
+
+# Assume average speed of 60 km/h (16.67 m/s) for duration calculation
+# This accounts for highways, but also traffic and road conditions
+AVERAGE_SPEED_MPS = 16.67
 
 def create_india_graph():
     """
@@ -27,71 +87,370 @@ def create_india_graph():
     Coordinates are in (latitude, longitude) format
     """
     G = nx.Graph()
-    
-    # Define major Indian cities with their coordinates
-    locations = {
-        "Delhi": (28.6139, 77.2090),
-        "Mumbai": (19.0760, 72.8777),
-        "Bangalore": (12.9716, 77.5946),
-        "Chennai": (13.0827, 80.2707),
-        "Kolkata": (22.5726, 88.3639),
-        "Hyderabad": (17.3850, 78.4867),
-        "Ahmedabad": (23.0225, 72.5714),
-        "Pune": (18.5204, 73.8567),
-        "Jaipur": (26.9124, 75.7873),
-        "Lucknow": (26.8467, 80.9462),
-        "Bhopal": (23.2599, 77.4126),
-        "Patna": (25.5941, 85.1376),
-        "Nagpur": (21.1458, 79.0882),
-        "Chandigarh": (30.7333, 76.7794),
-        "Kochi": (9.9312, 76.2673),
-        "Visakhapatnam": (17.6868, 83.2185),
-        "Guwahati": (26.1445, 91.7362),
-        "Bhubaneswar": (20.2961, 85.8245),
-        "Varanasi": (25.3176, 82.9739),
-        "Amritsar": (31.6340, 74.8723)
-    }
-    
+
     # Add nodes with position attributes
-    for node, coords in locations.items():
+    for node, coords in INDIA_CITIES.items():
         G.add_node(node, pos=coords)
-    
-    # Define major routes connecting cities
-    # These connections roughly follow major highways and railway routes
-    routes = [
-        # Northern Routes
-        ("Delhi", "Chandigarh"), ("Delhi", "Jaipur"), ("Delhi", "Lucknow"),
-        ("Chandigarh", "Amritsar"), ("Lucknow", "Varanasi"), ("Lucknow", "Patna"),
-        
-        # Western Routes
-        ("Mumbai", "Pune"), ("Mumbai", "Ahmedabad"), ("Ahmedabad", "Jaipur"),
-        
-        # Central Routes
-        ("Bhopal", "Nagpur"), ("Bhopal", "Delhi"), ("Nagpur", "Mumbai"),
-        ("Bhopal", "Ahmedabad"), ("Nagpur", "Hyderabad"),
-        
-        # Eastern Routes
-        ("Kolkata", "Patna"), ("Kolkata", "Bhubaneswar"), ("Kolkata", "Guwahati"),
-        
-        # Southern Routes
-        ("Bangalore", "Chennai"), ("Bangalore", "Hyderabad"), ("Chennai", "Hyderabad"),
-        ("Bangalore", "Kochi"), ("Chennai", "Visakhapatnam"), ("Visakhapatnam", "Bhubaneswar"),
-        
-        # Additional Cross-Country Routes
-        ("Hyderabad", "Nagpur"), ("Patna", "Varanasi"), ("Jaipur", "Bhopal"),
-        ("Pune", "Bangalore"), ("Ahmedabad", "Bhopal")
-    ]
-    
+
     # Add edges with real distances and estimated durations
-    for n1, n2 in routes:
-        dist = haversine_distance(locations[n1], locations[n2])
-        # Assume average speed of 60 km/h (16.67 m/s) for duration calculation
-        # This accounts for highways, but also traffic and road conditions
-        duration = dist / 16.67
+    ends = np.array([(INDIA_CITIES[n1] + INDIA_CITIES[n2]) for n1, n2 in INDIA_ROUTES])
+    distances = haversine(ends[:, 0], ends[:, 1], ends[:, 2], ends[:, 3])
+    for (n1, n2), dist in zip(INDIA_ROUTES, distances.tolist()):
+        duration = dist / AVERAGE_SPEED_MPS
         G.add_edge(n1, n2, weight=dist, duration=duration)
-    
+
     return G
 
+def _route_result(G, route):
+    """
+    Build the get_route_data result dict for a node path through G
+    """
+    distance = 0
+    duration = 0
+    route_geometry = []
+
+    for i in range(len(route) - 1):
+        distance += G[route[i]][route[i + 1]]['weight']
+        duration += G[route[i]][route[i + 1]]['duration']
+        route_geometry.append(G.nodes[route[i]]['pos'])
+
+    route_geometry.append(G.nodes[route[-1]]['pos'])
+
+    return {
+        "geometry": route_geometry,
+        "distance": round(distance/1000, 2),  # Distance in kilometers
+        "duration": round(duration/3600, 2),  # Duration in hours
+        "path": route,
+        "start_city": route[0],
+        "end_city": route[-1]
+    }
+
+def _copy_result(result):
+    # Callers get their own copy so shared tables and caches cannot be mutated
+    if result is None:
+        return None
+    return dict(result, geometry=list(result["geometry"]), path=list(result["path"]))
+
+class RoutingEngine:
+    """
+    Long-lived routing engine that owns the road graph.
+
+    The graph is built once and, when ``precompute`` is enabled and the
+    graph has at most ``precompute_max_nodes`` nodes, every node-to-node
+    answer is computed up front so a route request is a dictionary lookup.
+    All-pairs tables grow with the square of the node count, so above the
+    limit (for example after loading a depot CSV) the engine answers
+    through the CSR search and the route cache instead. Coordinates are
+    snapped to nodes through a spatial index (see utils.spatial_index)
+    built once per node set. Any change to nodes or edges bumps
+    ``version`` and the tables are rebuilt lazily on the next query.
+
+    Graphs too large for all-pairs tables can run with ``precompute=False``
+    and ``landmarks=N``: queries then go through a CSR copy of the graph
+    using ALT (utils.landmarks), with the landmark tables persisted under
+    ``landmark_dir`` when given.
+
+    Without precomputed tables, answers can be kept in a RouteCache
+    (utils.route_cache) keyed by the snapped node pair and a fingerprint
+    of the graph, so repeated lanes skip path search entirely.
+    """
+
+    def __init__(self, graph=None, precompute=True, index_backend="auto",
+                 landmarks=0, landmark_dir=None, cache=None,
+                 precompute_max_nodes=None, **index_kwargs):
+        self.graph = graph if graph is not None else create_india_graph()
+        self.precompute = precompute
+        self.precompute_max_nodes = (PRECOMPUTE_MAX_NODES if precompute_max_nodes is None
+                                     else precompute_max_nodes)
+        self.cache = cache
+        self.landmarks = landmarks
+        self.landmark_dir = landmark_dir
+        self.index_backend = index_backend
+        self.index_kwargs = index_kwargs
+        self.version = 0
+        self._routes = None
+        self._index = None
+        self._csr = None
+        self._fingerprint = None
+        self._lock = threading.RLock()
+
+    # Graph mutation
+
+    def add_node(self, name, coords):
+        with self._lock:
+            self.graph.add_node(name, pos=tuple(coords))
+            self._invalidate(nodes_changed=True)
+
+    def add_edge(self, n1, n2, distance=None, duration=None):
+        """
+        Add or replace an edge. Distance (m) defaults to the great circle
+        distance and duration (s) to the distance at AVERAGE_SPEED_MPS.
+        """
+        with self._lock:
+            if distance is None:
+                distance = haversine_distance(self.graph.nodes[n1]['pos'],
+                                              self.graph.nodes[n2]['pos'])
+            if duration is None:
+                duration = distance / AVERAGE_SPEED_MPS
+            self.graph.add_edge(n1, n2, weight=distance, duration=duration)
+            self._invalidate()
+
+    def remove_edge(self, n1, n2):
+        with self._lock:
+            self.graph.remove_edge(n1, n2)
+            self._invalidate()
+
+    def remove_node(self, name):
+        with self._lock:
+            self.graph.remove_node(name)
+            self._invalidate(nodes_changed=True)
+
+    def load_nodes_csv(self, path, connect_k=2):
+        """
+        Load depots/hubs from a CSV with ``name``, ``lat`` and ``lon``
+        columns. Each new node is linked to its ``connect_k`` nearest
+        neighbours with great circle edges.
+        """
+        with open(path, newline="") as f:
+            rows = [(row["name"], (float(row["lat"]), float(row["lon"])))
+                    for row in csv.DictReader(f)]
+
+        with self._lock:
+            for name, coords in rows:
+                self.graph.add_node(name, pos=coords)
+            self._invalidate(nodes_changed=True)
+
+            index = self.spatial_index()
+            for name, coords in rows:
+                # The node itself comes back first at distance zero
+                for neighbour, dist in index.nearest(coords, k=connect_k + 1):
+                    if neighbour != name and not self.graph.has_edge(name, neighbour):
+                        self.graph.add_edge(name, neighbour, weight=dist,
+                                            duration=dist / AVERAGE_SPEED_MPS)
+            self._invalidate()
+            # Rebuild here rather than under the lock on the next route request
+            self.warm()
+        return len(rows)
+
+    def _invalidate(self, nodes_changed=False):
+        self.version += 1
+        self._routes = None
+        self._csr = None
+        self._fingerprint = None
+        if nodes_changed:
+            self._index = None
+        if self.cache is not None:
+            # The persisted tier is pruned once the new fingerprint is known,
+            # so a restart that reloads the same graph keeps its entries
+            self.cache.clear()
+
+    def fingerprint(self):
+        """
+        Content hash of the nodes and edges. Unlike ``version`` it is
+        stable across restarts, so persisted cache entries stay usable.
+        """
+        fingerprint = self._fingerprint
+        if fingerprint is None:
+            with self._lock:
+                digest = hashlib.sha1()
+                for node, pos in sorted(self.graph.nodes(data='pos'), key=lambda n: str(n[0])):
+                    digest.update(repr((node, pos)).encode())
+                edges = sorted((sorted((str(u), str(v))), d['weight'], d['duration'])
+                               for u, v, d in self.graph.edges(data=True))
+                digest.update(repr(edges).encode())
+                fingerprint = self._fingerprint = digest.hexdigest()
+                if self.cache is not None:
+                    self.cache.invalidate(keep_fingerprint=fingerprint)
+        return fingerprint
+
+    # Precomputed tables
+
+    def uses_tables(self):
+        """True if queries are answered from all-pairs tables"""
+        return self.precompute and len(self.graph) <= self.precompute_max_nodes
+
+    def _build_tables(self):
+        G = self.graph
+        routes = {}
+        for source, paths in nx.all_pairs_dijkstra_path(G, weight='weight'):
+            routes[source] = {target: _route_result(G, path)
+                              for target, path in paths.items()}
+        return routes
+
+    def _tables(self):
+        routes = self._routes
+        if routes is None:
+            with self._lock:
+                if self._routes is None:
+                    self._routes = self._build_tables()
+                routes = self._routes
+        return routes
+
+    def csr_graph(self):
+        """CSR copy of the graph with landmark tables attached, if enabled"""
+        csr = self._csr
+        if csr is None:
+            with self._lock:
+                if self._csr is None:
+                    csr = CSRGraph.from_networkx(self.graph)
+                    if self.landmarks:
+                        if self.landmark_dir:
+                            index = LandmarkIndex.load_or_build(csr, self.landmark_dir,
+                                                                self.landmarks)
+                        else:
+                            index = LandmarkIndex.build(csr, self.landmarks)
+                        csr.use_landmarks(index)
+                    self._csr = csr
+                csr = self._csr
+        return csr
+
+    def warm(self):
+        """Build the route tables now instead of on the first query."""
+        if self.uses_tables():
+            self._tables()
+        elif self.landmarks or self.precompute:
+            self.csr_graph()
+
+    # Queries
+
+    def spatial_index(self):
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    names, coords = zip(*self.graph.nodes(data='pos')) if len(self.graph) else ((), ())
+                    self._index = build_spatial_index(names, coords, self.index_backend,
+                                                      **self.index_kwargs)
+                index = self._index
+        return index
+
+    def nearest_node(self, coords):
+        return self.spatial_index().nearest_name(coords)
+
+    def nearest_nodes(self, coords, k=1):
+        """List of (node, distance_m) for the k nodes closest to coords"""
+        return self.spatial_index().nearest(coords, k=k)
+
+    def nodes_within(self, coords, radius_m):
+        """List of (node, distance_m) for nodes within radius_m of coords"""
+        return self.spatial_index().within_radius(coords, radius_m)
+
+    def route_nodes(self, start_node, end_node):
+        """
+        Route between two graph nodes, or None if they are not connected
+        """
+        if self.uses_tables():
+            ROUTE_LOOKUPS.inc("table")
+            return _copy_result(self._tables()[start_node].get(end_node))
+
+        if self.cache is None:
+            ROUTE_LOOKUPS.inc("search")
+            return self._search_route(start_node, end_node)
+
+        fingerprint = self.fingerprint()
+        result = self.cache.get(start_node, end_node, fingerprint)
+        if result is MISS:
+            ROUTE_LOOKUPS.inc("search")
+            result = self._search_route(start_node, end_node)
+            self.cache.put(start_node, end_node, fingerprint, result)
+        else:
+            ROUTE_LOOKUPS.inc("cache")
+        return _copy_result(result)
+
+    def _search_route(self, start_node, end_node):
+        # Graphs that outgrew the tables go through the CSR copy as well
+        if self.landmarks or self.precompute:
+            return self.csr_graph().route_nodes(start_node, end_node)
+
+        G = self.graph
+
+        def heuristic(n1, n2):
+            return haversine_distance(G.nodes[n1]['pos'], G.nodes[n2]['pos'])
+
+        try:
+            route = nx.astar_path(G, start_node, end_node,
+                                  heuristic=heuristic, weight='weight')
+        except nx.NetworkXNoPath:
+            return None
+        return _route_result(G, route)
+
+    def cost_matrix(self, nodes):
+        """Raw (distance m, duration s) matrices between graph nodes"""
+        return self.csr_graph().cost_matrix(nodes)
+
+    def route(self, start_coords, end_coords):
+        start_node = self.nearest_node(start_coords)
+        end_node = self.nearest_node(end_coords)
+        return self.route_nodes(start_node, end_node)
+
+    def route_batch(self, pairs):
+        """
+        Route many (start_coords, end_coords) pairs at once.
+
+        All coordinates are snapped in one vectorized pass and pairs are
+        grouped by start node, so each distinct start costs at most one
+        single-source search. Returns one result dict (or None) per pair.
+        """
+        if not pairs:
+            return []
+        coords = np.array([c for pair in pairs for c in pair], dtype=np.float64)
+        snapped = self.spatial_index().nearest_names(coords)
+        starts, ends = snapped[0::2], snapped[1::2]
+
+        if self.uses_tables():
+            return [self.route_nodes(s, e) for s, e in zip(starts, ends)]
+
+        results = [None] * len(pairs)
+        fingerprint = self.fingerprint() if self.cache is not None else None
+        by_start = {}
+        for i, start in enumerate(starts):
+            if self.cache is not None:
+                cached = self.cache.get(start, ends[i], fingerprint)
+                if cached is not MISS:
+                    ROUTE_LOOKUPS.inc("cache")
+                    results[i] = _copy_result(cached)
+                    continue
+            by_start.setdefault(start, []).append(i)
+        ROUTE_LOOKUPS.inc("search", amount=sum(map(len, by_start.values())))
+
+        csr = self.csr_graph()
+        for start, indices in by_start.items():
+            routes = csr.route_many(start, {ends[i] for i in indices})
+            if self.cache is not None:
+                for end, route in routes.items():
+                    self.cache.put(start, end, fingerprint, route)
+            for i in indices:
+                results[i] = _copy_result(routes[ends[i]])
+        return results
+
+# Process-wide engine settings. Precomputed tables suit the built-in city
+# graph; graphs above PRECOMPUTE_MAX_NODES fall back to the route cache.
+ROUTING_PRECOMPUTE = os.getenv("ROUTING_PRECOMPUTE", "1") != "0"
+PRECOMPUTE_MAX_NODES = int(os.getenv("ROUTING_PRECOMPUTE_MAX_NODES", "250"))
+ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", "4096"))
+ROUTE_CACHE_PATH = os.getenv("ROUTE_CACHE_PATH")  # SQLite file; unset for memory only
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_routing_engine():
+    """
+    Return the process-wide routing engine, building it on first use
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                # Also used with precompute on, once the graph outgrows the tables
+                cache = None
+                if ROUTE_CACHE_SIZE > 0:
+                    cache = RouteCache(ROUTE_CACHE_SIZE, ROUTE_CACHE_PATH)
+                engine = RoutingEngine(precompute=ROUTING_PRECOMPUTE, cache=cache)
+                engine.spatial_index()
+                engine.warm()
+                _engine = engine
+    return _engine
+
 def get_route_data(start_coords, end_coords):
     """
     Get the optimal route between two coordinates
@@ -103,48 +462,66 @@ def get_route_data(start_coords, end_coords):
     Returns:
         dict: Contains route geometry, distance, and duration
     """
-    # Create the India graph
-    G = create_india_graph()
-    
-    # Find nearest nodes to start and end coordinates
-    def find_nearest_node(coords):
-        return min(G.nodes(), 
-                  key=lambda n: haversine_distance(coords, G.nodes[n]['pos']))
-    
-    start_node = find_nearest_node(start_coords)
-    end_node = find_nearest_node(end_coords)
-    
     try:
-        # Find shortest path using A* algorithm
-        def heuristic(n1, n2):
-            return haversine_distance(G.nodes[n1]['pos'], G.nodes[n2]['pos'])
-        
-        route = nx.astar_path(G, start_node, end_node, 
-                            heuristic=heuristic, weight='weight')
-        
-        # Calculate total distance and duration
-        distance = 0
-        duration = 0
-        route_geometry = []
-        
-        for i in range(len(route) - 1):
-            distance += G[route[i]][route[i + 1]]['weight']
-            duration += G[route[i]][route[i + 1]]['duration']
-            route_geometry.append(G.nodes[route[i]]['pos'])
-        
-        route_geometry.append(G.nodes[route[-1]]['pos'])
-        
-        return {
-            "geometry": route_geometry,
-            "distance": round(distance/1000, 2),  # Distance in kilometers
-            "duration": round(duration/3600, 2),  # Duration in hours
-            "path": route,
-            "start_city": start_node,
-            "end_city": end_node
-        }
-        
-    except nx.NetworkXNoPath:
+        return get_routing_engine().route(start_coords, end_coords)
+    except Exception as e:
+        ROUTE_ERRORS.inc(type(e).__name__)
+        raise
+
+def get_route_cache_stats():
+    """
+    Hit/miss counters of the process-wide route cache, or None when it is
+    disabled (ROUTE_CACHE_SIZE=0)
+    """
+    cache = get_routing_engine().cache
+    return cache.stats() if cache is not None else None
+
+def _route_cache_metrics():
+    # Only once the engine exists; a scrape should not build the graph
+    if _engine is None or _engine.cache is None:
         return None
+    return _engine.cache.stats()
+
+register_collector("catnip_route_cache", _route_cache_metrics, "Route cache statistics.")
+
+def _validate_coords(coords):
+    try:
+        lat, lon = (float(v) for v in coords)
+    except (TypeError, ValueError):
+        raise ValueError(f"Coordinates must be a (latitude, longitude) pair, got {coords!r}.")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"Coordinates out of range: {coords!r}.")
+    return lat, lon
+
+def get_route_data_batch(pairs):
+    """
+    Get optimal routes for many coordinate pairs in one call
+
+    Args:
+        pairs: List of (start_coords, end_coords) tuples
+
+    Returns:
+        list: One entry per pair, either {"route": <get_route_data dict>}
+        or {"error": <message>}
+    """
+    results = [None] * len(pairs)
+    valid, valid_idx = [], []
+    for i, pair in enumerate(pairs):
+        try:
+            start, end = pair
+        except (TypeError, ValueError):
+            results[i] = {"error": "Each pair must be (start_coords, end_coords)."}
+            continue
+        try:
+            valid.append((_validate_coords(start), _validate_coords(end)))
+        except ValueError as e:
+            results[i] = {"error": str(e)}
+            continue
+        valid_idx.append(i)
+
+    for i, route in zip(valid_idx, get_routing_engine().route_batch(valid)):
+        results[i] = {"route": route} if route is not None else {"error": "No route found."}
+    return results
 
 # Example usage
 if __name__ == "__main__":
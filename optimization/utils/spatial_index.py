@@ -0,0 +1,229 @@
+import numpy as np
+from math import radians, degrees, sin, cos, asin
+
+from utils.distance import EARTH_RADIUS_M, one_to_many, nearest_indices
+
+class SpatialIndex:
+    """
+    Nearest-neighbour index over named (latitude, longitude) points.
+
+    Queries return lists of (name, distance_in_meters) sorted by distance.
+    """
+
+    def __init__(self, names, coords):
+        self.names = list(names)
+        self.coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        if len(self.names) != len(self.coords):
+            raise ValueError("names and coords must have the same length")
+
+    def __len__(self):
+        return len(self.names)
+
+    def nearest(self, coords, k=1):
+        raise NotImplementedError
+
+    def within_radius(self, coords, radius_m):
+        raise NotImplementedError
+
+    def nearest_name(self, coords):
+        if not self.names:
+            raise ValueError("Spatial index is empty")
+        return self.nearest(coords, k=1)[0][0]
+
+    def nearest_names(self, coords):
+        """Nearest point name for each row of an (m, 2) array of coords"""
+        return [self.nearest_name(c) for c in np.asarray(coords, dtype=np.float64).reshape(-1, 2)]
+
+    def _result(self, idx, dist, limit=None):
+        order = np.argsort(dist, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return [(self.names[idx[i]], float(dist[i])) for i in order]
+
+class BruteForceIndex(SpatialIndex):
+    """
+    Exact scan over every point, vectorized with NumPy
+    """
+
+    def nearest(self, coords, k=1):
+        dist = one_to_many(coords, self.coords)
+        idx = np.arange(len(self.names))
+        if k < len(dist):
+            part = np.argpartition(dist, k - 1)[:k]
+            idx, dist = idx[part], dist[part]
+        return self._result(idx, dist)
+
+    def within_radius(self, coords, radius_m):
+        dist = one_to_many(coords, self.coords)
+        idx = np.nonzero(dist <= radius_m)[0]
+        return self._result(idx, dist[idx])
+
+    def nearest_names(self, coords):
+        # Chunked (queries x points) haversine passes over every point
+        if not self.names:
+            raise ValueError("Spatial index is empty")
+        return [self.names[i] for i in nearest_indices(coords, self.coords)]
+
+def _ring(ci, cj, r):
+    """Cells at Chebyshev distance exactly r from (ci, cj)"""
+    if r == 0:
+        yield (ci, cj)
+        return
+    for j in range(cj - r, cj + r + 1):
+        yield (ci - r, j)
+        yield (ci + r, j)
+    for i in range(ci - r + 1, ci + r):
+        yield (i, cj - r)
+        yield (i, cj + r)
+
+class GridIndex(SpatialIndex):
+    """
+    Geohash-style grid: points are bucketed into fixed lat/lon cells and
+    queries only look at the cells that can contain an answer.
+    """
+
+    def __init__(self, names, coords, cell_deg=0.5):
+        super().__init__(names, coords)
+        self.cell_deg = cell_deg
+        self._cells = {}
+
+        keys = np.floor(self.coords / cell_deg).astype(np.int64)
+        for i, (ci, cj) in enumerate(keys.tolist()):
+            self._cells.setdefault((ci, cj), []).append(i)
+        self._cells = {key: np.array(members) for key, members in self._cells.items()}
+
+        if len(keys):
+            self._min_key = keys.min(axis=0)
+            self._max_key = keys.max(axis=0)
+
+    def _cell(self, coords):
+        return (int(np.floor(coords[0] / self.cell_deg)),
+                int(np.floor(coords[1] / self.cell_deg)))
+
+    def _candidates_in_box(self, lat_min, lat_max, lon_min, lon_max):
+        i0, i1 = int(np.floor(lat_min / self.cell_deg)), int(np.floor(lat_max / self.cell_deg))
+        j0, j1 = int(np.floor(lon_min / self.cell_deg)), int(np.floor(lon_max / self.cell_deg))
+
+        # Walk whichever is smaller: the cells in the box or the occupied cells
+        if (i1 - i0 + 1) * (j1 - j0 + 1) <= len(self._cells):
+            members = [self._cells[(i, j)]
+                       for i in range(i0, i1 + 1)
+                       for j in range(j0, j1 + 1)
+                       if (i, j) in self._cells]
+        else:
+            members = [m for (i, j), m in self._cells.items()
+                       if i0 <= i <= i1 and j0 <= j <= j1]
+
+        if not members:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(members)
+
+    def _radius_box(self, coords, radius_m):
+        lat, lon = coords
+        angle = radius_m / EARTH_RADIUS_M
+        dlat = degrees(angle)
+        lat_min, lat_max = lat - dlat, lat + dlat
+
+        # Near the poles or across the antimeridian every longitude qualifies
+        full = (-180.0, 180.0)
+        if lat_max >= 90 or lat_min <= -90:
+            return lat_min, lat_max, full
+        ratio = sin(angle) / cos(radians(lat))
+        if ratio >= 1:
+            return lat_min, lat_max, full
+        dlon = degrees(asin(ratio))
+        if lon - dlon < -180 or lon + dlon > 180:
+            return lat_min, lat_max, full
+        return lat_min, lat_max, (lon - dlon, lon + dlon)
+
+    def within_radius(self, coords, radius_m):
+        if not self.names:
+            return []
+        lat_min, lat_max, (lon_min, lon_max) = self._radius_box(coords, radius_m)
+        idx = self._candidates_in_box(lat_min, lat_max, lon_min, lon_max)
+        dist = one_to_many(coords, self.coords[idx])
+        keep = dist <= radius_m
+        return self._result(idx[keep], dist[keep])
+
+    def nearest(self, coords, k=1):
+        if not self.names:
+            return []
+        k = min(k, len(self.names))
+        ci, cj = self._cell(coords)
+
+        # Grow square rings of cells around the query until k points are seen
+        max_ring = int(max(abs(ci - self._min_key[0]), abs(ci - self._max_key[0]),
+                           abs(cj - self._min_key[1]), abs(cj - self._max_key[1])))
+        found = []
+        count = 0
+        for r in range(max_ring + 1):
+            for key in _ring(ci, cj, r):
+                members = self._cells.get(key)
+                if members is not None:
+                    found.append(members)
+                    count += len(members)
+            if count >= k:
+                break
+
+        # The k-th distance so far bounds the answer; a radius query over
+        # that bound picks up closer points sitting in cells outside the rings
+        idx = np.concatenate(found)
+        dist = one_to_many(coords, self.coords[idx])
+        bound = np.partition(dist, k - 1)[k - 1]
+        return self.within_radius(coords, bound * (1 + 1e-9) + 1e-6)[:k]
+
+class BallTreeIndex(SpatialIndex):
+    """
+    scikit-learn BallTree on the haversine metric (optional dependency)
+    """
+
+    def __init__(self, names, coords, leaf_size=40):
+        super().__init__(names, coords)
+        try:
+            from sklearn.neighbors import BallTree
+        except ImportError as exc:
+            raise ImportError("BallTreeIndex requires scikit-learn") from exc
+        self._tree = BallTree(np.radians(self.coords), metric="haversine", leaf_size=leaf_size)
+
+    def nearest(self, coords, k=1):
+        if not self.names:
+            return []
+        k = min(k, len(self.names))
+        dist, idx = self._tree.query(np.radians([coords]), k=k)
+        return self._result(idx[0], dist[0] * EARTH_RADIUS_M)
+
+    def nearest_names(self, coords):
+        if not self.names:
+            raise ValueError("Spatial index is empty")
+        _, idx = self._tree.query(np.radians(np.asarray(coords, dtype=np.float64).reshape(-1, 2)), k=1)
+        return [self.names[i] for i in idx[:, 0]]
+
+    def within_radius(self, coords, radius_m):
+        if not self.names:
+            return []
+        idx, dist = self._tree.query_radius(np.radians([coords]), r=radius_m / EARTH_RADIUS_M,
+                                            return_distance=True)
+        return self._result(idx[0], dist[0] * EARTH_RADIUS_M)
+
+# Below this many points a vectorized scan beats any index structure
+AUTO_BRUTE_FORCE_MAX = 256
+
+SPATIAL_INDEX_BACKENDS = {
+    "brute": BruteForceIndex,
+    "grid": GridIndex,
+    "balltree": BallTreeIndex,
+}
+
+def build_spatial_index(names, coords, backend="auto", **kwargs):
+    """
+    Build a spatial index using one of SPATIAL_INDEX_BACKENDS. ``"auto"``
+    scans small point sets directly and uses the grid otherwise.
+    """
+    if backend == "auto":
+        backend = "brute" if len(names) <= AUTO_BRUTE_FORCE_MAX else "grid"
+        kwargs = kwargs if backend == "grid" else {}
+    try:
+        index_cls = SPATIAL_INDEX_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown spatial index backend '{backend}'.")
+    return index_cls(names, coords, **kwargs)
@@ -0,0 +1,265 @@
+import math
+import time
+
+import numpy as np
+
+from utils.routing import get_routing_engine, _validate_coords
+
+# Moves must save at least this much to count, so float noise cannot loop
+EPSILON = 1e-7
+# Bounds on a single solve, so one request cannot hold a worker for long
+MAX_STOPS = 1000
+MAX_TIME_BUDGET = 30.0
+
+def _positive_int(value, name):
+    # bool is an int subclass, but True vehicles is a client bug
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"{name} must be a positive integer, got {value!r}.")
+    return value
+
+def _time_budget(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value <= MAX_TIME_BUDGET:
+        raise ValueError(f"time_budget must be a number of seconds in (0, {MAX_TIME_BUDGET:g}], got {value!r}.")
+    return float(value)
+
+def _route_cost(cost, route):
+    return float(cost[route[:-1], route[1:]].sum())
+
+def _insertion(cost, route, first, last, reversible=False):
+    """
+    Cheapest place to insert the segment first..last into route.
+    Returns (delta, position, reversed).
+    """
+    a, b = route[:-1], route[1:]
+    base = cost[a, b]
+    forward = cost[a, first] + cost[last, b] - base
+    best = int(np.argmin(forward))
+    delta, flip = float(forward[best]), False
+    if reversible and first != last:
+        backward = cost[a, last] + cost[first, b] - base
+        back_best = int(np.argmin(backward))
+        if backward[back_best] < delta:
+            best, delta, flip = back_best, float(backward[back_best]), True
+    return delta, best + 1, flip
+
+def nearest_insertion(cost, num_vehicles=1, capacity=None, stops=None):
+    """
+    Build one tour per vehicle, all starting and ending at point 0.
+
+    With several vehicles each tour is seeded with a stop far from the
+    depot and the other seeds. Then the unrouted stop closest to anything
+    already routed is inserted at the cheapest feasible position.
+    """
+    n = len(cost)
+    stops = list(range(1, n)) if stops is None else list(stops)
+    capacity = capacity or len(stops)
+    routes = [np.array([0, 0]) for _ in range(num_vehicles)]
+    unrouted = np.zeros(n, dtype=bool)
+    unrouted[stops] = True
+    nearest = np.minimum(cost[0], cost[:, 0])
+
+    if num_vehicles > 1:
+        spread = nearest.copy()
+        for v in range(min(num_vehicles, len(stops))):
+            seed = int(np.argmax(np.where(unrouted, spread, -np.inf)))
+            routes[v] = np.array([0, seed, 0])
+            unrouted[seed] = False
+            spread = np.minimum(spread, np.minimum(cost[seed], cost[:, seed]))
+            nearest = np.minimum(nearest, np.minimum(cost[seed], cost[:, seed]))
+
+    while unrouted.any():
+        j = int(np.argmin(np.where(unrouted, nearest, np.inf)))
+        best = None
+        for v, route in enumerate(routes):
+            if len(route) - 2 >= capacity:
+                continue
+            delta, position, _ = _insertion(cost, route, j, j)
+            if best is None or delta < best[0]:
+                best = (delta, v, position)
+        if best is None:
+            raise ValueError("Not enough vehicle capacity for all stops.")
+        _, v, position = best
+        routes[v] = np.insert(routes[v], position, j)
+        unrouted[j] = False
+        nearest = np.minimum(nearest, np.minimum(cost[j], cost[:, j]))
+
+    return routes
+
+def two_opt(cost, route, deadline):
+    """
+    Reverse sub-tours while that shortens the route. Assumes the costs
+    between stops are symmetric. The deadline is checked between sweeps.
+    """
+    route = route.copy()
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(len(route) - 3):
+            a, b = route[i], route[i + 1]
+            c, d = route[i + 2:-1], route[i + 3:]
+            delta = cost[a, c] + cost[b, d] - cost[a, b] - cost[c, d]
+            j = int(np.argmin(delta))
+            if delta[j] < -EPSILON:
+                route[i + 1:i + j + 3] = route[i + 1:i + j + 3][::-1].copy()
+                improved = True
+    return route
+
+def or_opt(cost, routes, capacity, deadline, max_segment=3, reversible=True):
+    """
+    Move segments of up to max_segment consecutive stops to the cheapest
+    position in any tour (including their own) while that saves cost.
+    """
+    routes = [r.copy() for r in routes]
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for v in range(len(routes)):
+            length = 1
+            s = 1
+            while length <= max_segment:
+                route = routes[v]
+                if s + length > len(route) - 1:
+                    length, s = length + 1, 1
+                    continue
+                if time.perf_counter() >= deadline:
+                    return routes
+
+                segment = route[s:s + length]
+                prev, nxt = route[s - 1], route[s + length]
+                gain = cost[prev, segment[0]] + cost[segment[-1], nxt] - cost[prev, nxt]
+                remainder = np.concatenate([route[:s], route[s + length:]])
+
+                best = None
+                for w in range(len(routes)):
+                    target = remainder if w == v else routes[w]
+                    if w != v and len(target) - 2 + length > capacity:
+                        continue
+                    delta, position, flip = _insertion(cost, target, segment[0], segment[-1], reversible)
+                    if best is None or delta < best[0]:
+                        best = (delta, w, position, flip)
+
+                delta, w, position, flip = best
+                if delta - gain < -EPSILON:
+                    moved = segment[::-1] if flip else segment
+                    target = remainder if w == v else routes[w]
+                    routes[w] = np.concatenate([target[:position], moved, target[position:]])
+                    if w != v:
+                        routes[v] = remainder
+                    improved = True
+                else:
+                    s += 1
+    return routes
+
+def optimize_routes(cost, num_vehicles=1, capacity=None, time_budget=0.5, stops=None):
+    """
+    Nearest insertion followed by 2-opt and or-opt local search until no
+    move helps or time_budget (seconds) runs out. Point 0 is the depot.
+    """
+    deadline = time.perf_counter() + time_budget
+    stops = list(range(1, len(cost))) if stops is None else list(stops)
+    capacity = capacity or len(stops) or 1
+    routes = nearest_insertion(cost, num_vehicles, capacity, stops)
+
+    inner = cost[np.ix_(stops, stops)] if stops else cost
+    symmetric = np.allclose(inner, inner.T)
+
+    while time.perf_counter() < deadline:
+        before = sum(_route_cost(cost, r) for r in routes)
+        if symmetric:
+            routes = [two_opt(cost, r, deadline) for r in routes]
+        routes = or_opt(cost, routes, capacity, deadline, reversible=symmetric)
+        if sum(_route_cost(cost, r) for r in routes) >= before - EPSILON:
+            break
+    return routes
+
+def _vehicle_result(engine, nodes, route, distance, duration, vehicle, closed=True):
+    if not closed:
+        route = route[:-1]
+    geometry, path = [], []
+    for a, b in zip(route[:-1], route[1:]):
+        if nodes[a] == nodes[b]:
+            continue
+        leg = engine.route_nodes(nodes[a], nodes[b])
+        # Consecutive legs share their junction node
+        skip = 1 if path else 0
+        geometry.extend(leg["geometry"][skip:])
+        path.extend(leg["path"][skip:])
+    if not path:
+        geometry = [engine.graph.nodes[nodes[route[0]]]['pos']]
+        path = [nodes[route[0]]]
+
+    return {
+        "vehicle": vehicle,
+        "stops": [int(i) - 1 for i in (route[1:-1] if closed else route[1:])],
+        "geometry": geometry,
+        "distance": round(_route_cost(distance, route)/1000, 2),  # Distance in kilometers
+        "duration": round(_route_cost(duration, route)/3600, 2),  # Duration in hours
+        "path": path,
+        "start_city": path[0],
+        "end_city": path[-1]
+    }
+
+def solve_vrp(depot, stops, num_vehicles=1, max_stops_per_vehicle=None, time_budget=0.5,
+              objective="distance", return_to_depot=True, engine=None):
+    """
+    Plan multi-stop runs for one or more vehicles leaving from a depot
+
+    Args:
+        depot: (latitude, longitude) the vehicles start from
+        stops: List of (latitude, longitude) drop points
+        num_vehicles: Number of vehicles to plan for
+        max_stops_per_vehicle: Stops per vehicle; defaults to an even split
+        time_budget: Wall-clock seconds for the whole solve; local search
+            gets whatever the cost matrix build leaves of it
+        objective: "distance" or "duration"
+        return_to_depot: Whether tours end back at the depot
+
+    Returns:
+        dict: Per-vehicle routes with the same geometry/path fields as
+        get_route_data, stops that cannot be reached, and totals
+
+    Raises:
+        ValueError: Invalid coordinates, counts, time budget or objective
+    """
+    start = time.perf_counter()
+    if not isinstance(stops, (list, tuple)) or not 1 <= len(stops) <= MAX_STOPS:
+        raise ValueError(f"stops must be a list of 1 to {MAX_STOPS} (latitude, longitude) pairs.")
+    num_vehicles = _positive_int(num_vehicles, "vehicles")
+    if max_stops_per_vehicle is not None:
+        max_stops_per_vehicle = _positive_int(max_stops_per_vehicle, "max_stops_per_vehicle")
+    time_budget = _time_budget(time_budget)
+    if objective not in ("distance", "duration"):
+        raise ValueError("objective must be 'distance' or 'duration'.")
+    engine = engine or get_routing_engine()
+    coords = [_validate_coords(depot)] + [_validate_coords(s) for s in stops]
+
+    # Snap once, then build the matrix over distinct graph nodes only
+    nodes = engine.spatial_index().nearest_names(coords)
+    unique = list(dict.fromkeys(nodes))
+    position = {node: i for i, node in enumerate(unique)}
+    node_distance, node_duration = engine.cost_matrix(unique)
+    idx = np.array([position[node] for node in nodes])
+    distance = node_distance[np.ix_(idx, idx)]
+    duration = node_duration[np.ix_(idx, idx)]
+
+    reachable = np.isfinite(distance[0]) & np.isfinite(distance[:, 0])
+    routable = [i for i in range(1, len(coords)) if reachable[i]]
+    capacity = max_stops_per_vehicle or max(1, math.ceil(len(routable) / num_vehicles))
+
+    cost = (distance if objective == "distance" else duration).copy()
+    if not return_to_depot:
+        # Open tours: driving back to the depot is free
+        cost[:, 0] = 0
+    cost[~np.isfinite(cost)] = np.inf
+
+    remaining = max(0.0, time_budget - (time.perf_counter() - start))
+    routes = optimize_routes(cost, num_vehicles, capacity, remaining, routable)
+    vehicles = [_vehicle_result(engine, nodes, route, distance, duration, v, return_to_depot)
+                for v, route in enumerate(routes)]
+    return {
+        "vehicles": vehicles,
+        "unassigned": [i - 1 for i in range(1, len(coords)) if not reachable[i]],
+        "distance": round(sum(v["distance"] for v in vehicles), 2),
+        "duration": round(sum(v["duration"] for v in vehicles), 2),
+        "solve_seconds": round(time.perf_counter() - start, 4),
+    }